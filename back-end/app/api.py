@@ -1,121 +1,366 @@
-from app.models import FeedItem, SessionInfo, PresidentSchedule
-from app.crud import get_db
-from fastapi import APIRouter, Depends, HTTPException
+from app.models import (
+    FeedItem,
+    FeedItemArchive,
+    SessionInfo,
+    PresidentSchedule,
+    PresidentScheduleArchive,
+)
+from app.archive import get_archived_before
+from app.histogram import daily_counts
+from app.cache import cached_response
+from app.crud import get_read_db, get_sync_state
+from app.responses import FEED_ITEM_FIELDS, FastJSONResponse, JsonFragment, render_rss
+from app.rss_fetcher import INGEST_JOBS, last_success_key
+from app.search import (
+    FEED_ITEM_KIND,
+    PRESIDENT_SCHEDULE_KIND,
+    build_match_query,
+    matching_ids,
+    ranked_matches,
+)
+from app.pagination import (
+    decode_cursor,
+    encode_cursor,
+    merge_streams,
+    seek,
+    seek_source,
+    stream,
+)
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
-from sqlalchemy import desc, func, or_
+from sqlalchemy import desc, func, or_, select
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime
+from sqlalchemy.orm import Session, aliased
+from datetime import datetime, timedelta, timezone
+from itertools import islice
 import logging
 import re
 
 INVALID_BOUNDS = "Invalid limit/offset value. Must be > 0"
+INVALID_CURSOR = "Invalid cursor value"
+INVALID_DATE_RANGE = "Invalid from/to value. Must be an ISO 8601 date or datetime"
 ITEMS_NOT_FOUND = "Items not found"
 INTERNAL_SERVER_ERROR = "Internal server error"
 DATE_DOES_NOT_EXIST = (
     "The supplied date format was correct, but the date is not possible."
 )
 
+POTUS_SCHEDULE_SOURCE = "potus-schedule"
+
+# Items in the RSS rendering of the feed
+RSS_ITEM_COUNT = 100
+
 router = APIRouter()
 
 
 @router.get("/feed")
-async def retrieve_feed(
+def retrieve_feed(
+    request: Request,
     search_term: str = "",
     sources: str = "",
     limit: int = 100,
     offset: int = 0,
-    db: AsyncSession = Depends(get_db),
+    cursor: str = "",
+    from_date: str = Query("", alias="from"),
+    to_date: str = Query("", alias="to"),
+    collapse: bool = False,
+    db: Session = Depends(get_read_db),
 ):
     """
     Search entire feed, with optional filtering by sources, specific keywords, or dates.
+    Pass the returned next_cursor back as `cursor` to fetch the following page. With
+    collapse, near-duplicates of an item already in the results are left out.
+    """
+    return cached_response(
+        request,
+        lambda: feed_response(
+            db, search_term, sources, limit, offset, cursor, from_date, to_date, collapse
+        ),
+    )
+
+
+@router.get("/feed/rss")
+def retrieve_feed_rss(request: Request, sources: str = "", db: Session = Depends(get_read_db)):
+    """
+    The newest feed items as an RSS 2.0 feed, with optional filtering by sources.
+    Feed readers can poll it conditionally with If-None-Match.
     """
+    return cached_response(
+        request,
+        lambda: feed_response(db, "", sources, RSS_ITEM_COUNT, 0, ""),
+        render=render_rss,
+        media_type="application/rss+xml",
+    )
+
+
+def feed_response(
+    db, search_term, sources, limit, offset, cursor, from_date="", to_date="", collapse=False
+):
     status = "error"
     data = None
     message = None
+    next_cursor = None
     if is_valid_bounds(limit, offset):
-        rss_query = db.query(FeedItem)
-        president_schedule_query = db.query(PresidentSchedule)
-        potus_schedule_included = True
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError:
+            return formatted_response(status, data, INVALID_CURSOR)
+        try:
+            start, end = parse_date_range(from_date, to_date)
+        except (ValueError, OverflowError):
+            return formatted_response(status, data, INVALID_DATE_RANGE)
 
         # Apply source filtering if sources are provided
-        if sources:
-            source_list = sources.split(",")
-            rss_query = rss_query.filter(FeedItem.source.in_(source_list))
-            potus_schedule_included = "potus-schedule" in source_list
+        source_list = sources.split(",") if sources else None
+        potus_schedule_included = not source_list or POTUS_SCHEDULE_SOURCE in source_list
 
+        match_query = None
         # Apply search term filtering if a search term is provided
         if search_term:
             # If the input matches the date format, search for items with that date.
             if is_valid_date(search_term):
                 try:
-                    date_obj = datetime.strptime(search_term, "%B %d, %Y")
-                    rss_query = rss_query.filter(
-                        func.date(FeedItem.pubDate) == date_obj.date()
-                    )
-                    president_schedule_query = president_schedule_query.filter(
-                        func.date(PresidentSchedule.time) == date_obj.date()
-                    )
+                    day = datetime.strptime(search_term, "%B %d, %Y")
                 except ValueError:
                     return formatted_response(status, data, DATE_DOES_NOT_EXIST)
+                start = max(start, day) if start else day
+                end = min(end, day + timedelta(days=1)) if end else day + timedelta(days=1)
             else:
-                # If search term is not a date, apply text search
-                rss_query = rss_query.filter(FeedItem.title.ilike(f"%{search_term}%"))
-                president_schedule_query = president_schedule_query.filter(
-                    or_(
-                        PresidentSchedule.description.ilike(f"%{search_term}%"),
-                        PresidentSchedule.location.ilike(f"%{search_term}%"),
-                    )
-                )
-
-        # Fetch RSS items and POTUS schedule items with pagination
-        rss_items = (
-            rss_query.order_by(desc(FeedItem.pubDate)).offset(offset).limit(limit).all()
-        )
-        rss_items = [
-            {
-                "title": item.title,
-                "link": item.link,
-                "pubDate": item.pubDate,
-                "source": item.source,
-                "updated_at": item.updated_at,
-            }
-            for item in rss_items
-        ]
+                # If search term is not a date, apply full-text search
+                match_query = build_match_query(search_term)
+                if match_query is None:
+                    return formatted_response(status, data, ITEMS_NOT_FOUND)
 
-        president_schedule_items = []
-        if potus_schedule_included:
-            president_schedule_items = (
-                president_schedule_query.offset(offset).limit(limit).all()
-            )
-            president_schedule_items = [
-                format_president_schedule_item(item)
-                for item in president_schedule_items
-            ]
-
-        # Combine, sort, and then return the paginated results
-        combined_items = sorted(
-            rss_items + president_schedule_items, key=get_pub_date, reverse=True
+        # Seek both tables past the cursor and lazily merge the two ordered streams,
+        # so only the rows that end up on the page (plus one) are read
+        rows_needed = offset + limit + 1
+        filters = (
+            source_list, potus_schedule_included, (start, end), match_query, after, rows_needed, collapse
         )
-        paginated_combined_items = combined_items[:limit]
+        streams = tier_streams(db, FeedItem, PresidentSchedule, *filters)
+        page = list(islice(merge_streams(streams), offset, rows_needed))
+        archived_before = get_archived_before(db)
+        if (
+            len(page) < rows_needed - offset
+            and archived_before is not None
+            and (start is None or start < archived_before)
+        ):
+            # The hot tables ran out before the page was full, so it continues into the archives
+            streams = tier_streams(db, FeedItem, PresidentSchedule, *filters) + tier_streams(
+                db, FeedItemArchive, PresidentScheduleArchive, *filters
+            )
+            page = list(islice(merge_streams(streams), offset, rows_needed))
 
-        if combined_items:
+        if page:
             status = "success"
-            data = paginated_combined_items
+            data = [item for _, item in page[:limit]]
+            if len(page) > limit:
+                next_cursor = encode_cursor(*page[limit - 1][0])
         else:
             message = ITEMS_NOT_FOUND
     else:
         message = INVALID_BOUNDS
+    return formatted_response(status, data, message, next_cursor=next_cursor)
+
+
+def tier_streams(
+    db,
+    feed_model,
+    schedule_model,
+    source_list,
+    potus_schedule_included,
+    date_range,
+    match_query,
+    after,
+    rows_needed,
+    collapse=False,
+):
+    """
+    The ordered streams to merge from one tier: the hot tables or the archives.
+    Requested sources are each read as their own stream, so every one is a seek on
+    the (source, pubDate, id) index instead of a filtered scan by date.
+    """
+    if source_list:
+        feed_sources = [
+            source for source in dict.fromkeys(source_list) if source != POTUS_SCHEDULE_SOURCE
+        ]
+    else:
+        feed_sources = [None]
+    streams = [
+        feed_item_stream(
+            db, feed_model, source, date_range, match_query, after, rows_needed, collapse, source_list
+        )
+        for source in feed_sources
+    ]
+    if potus_schedule_included:
+        streams.append(
+            schedule_stream(db, schedule_model, date_range, match_query, after, rows_needed)
+        )
+    return streams
+
+
+def feed_item_stream(
+    db, model, source, date_range, match_query, after, rows_needed, collapse=False, source_list=None
+):
+    """
+    Ordered stream of the feed items in model (FeedItem or its archive) matching the
+    filters, from one source or, if source is None, from all of them.
+    """
+    query = db.query(model)
+    query = filter_date_range(query, model.pubDate, date_range)
+    if collapse:
+        query = collapse_duplicates(query, model, source_list, date_range, match_query)
+    if match_query is not None:
+        query = query.filter(model.id.in_(matching_ids(match_query, FEED_ITEM_KIND)))
+    if source is None:
+        query = seek(query, model.pubDate, model.source, model.id, after)
+    else:
+        query = seek_source(query.filter(model.source == source), model.pubDate, model.id, source, after)
+    return stream(query.limit(rows_needed), feed_item_sort_key, feed_item_payload)
+
+
+def collapse_duplicates(query, model, source_list, date_range, match_query):
+    """
+    Leaves out items whose cluster's first item is listed too, so each cluster of
+    near-duplicates is listed once. The first item is listed if it matches the same
+    sources, date range and search, in either tier.
+    """
+    first_listed = []
+    for first_model in (FeedItem, FeedItemArchive):
+        first = aliased(first_model)
+        listed = select(first.id).where(first.id == model.cluster_id)
+        if source_list:
+            listed = listed.where(first.source.in_(source_list))
+        listed = filter_date_range(listed, first.pubDate, date_range)
+        if match_query is not None:
+            listed = listed.where(first.id.in_(matching_ids(match_query, FEED_ITEM_KIND)))
+        first_listed.append(listed.exists())
+    return query.filter(
+        or_(model.cluster_id.is_(None), model.cluster_id == model.id, ~or_(*first_listed))
+    )
+
+
+def schedule_stream(db, model, date_range, match_query, after, rows_needed):
+    """
+    Ordered stream of the schedule entries in model (PresidentSchedule or its archive)
+    matching the filters.
+    """
+    query = db.query(model)
+    query = filter_date_range(query, model.time, date_range)
+    if match_query is not None:
+        query = query.filter(model.id.in_(matching_ids(match_query, PRESIDENT_SCHEDULE_KIND)))
+    query = seek_source(query, model.time, model.id, POTUS_SCHEDULE_SOURCE, after).limit(rows_needed)
+    return stream(query, president_schedule_sort_key, format_president_schedule_item)
+
+
+def filter_date_range(query, date_column, date_range):
+    """
+    Restricts a query to start <= date < end, as plain comparisons on the indexed column.
+    """
+    start, end = date_range
+    if start is not None:
+        query = query.filter(date_column >= start)
+    if end is not None:
+        query = query.filter(date_column < end)
+    return query
+
+
+@router.get("/feed/histogram")
+def feed_histogram(
+    request: Request,
+    sources: str = "",
+    from_date: str = Query("", alias="from"),
+    to_date: str = Query("", alias="to"),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Number of items per day and source, for drawing activity timelines.
+    """
+    return cached_response(
+        request, lambda: histogram_response(db, sources, from_date, to_date)
+    )
+
+
+def histogram_response(db, sources, from_date, to_date):
+    status = "error"
+    data = None
+    message = None
+    try:
+        start, end = parse_date_range(from_date, to_date)
+    except (ValueError, OverflowError):
+        return formatted_response(status, data, INVALID_DATE_RANGE)
+
+    counts = daily_counts(db, sources.split(",") if sources else None, start, end)
+    if counts:
+        status = "success"
+        data = [
+            {"day": row.day, "source": row.source, "count": row.count} for row in counts
+        ]
+    else:
+        message = ITEMS_NOT_FOUND
     return formatted_response(status, data, message)
 
 
-def get_pub_date(item):
-    if isinstance(item, FeedItem):
-        return item.pubDate
-    elif isinstance(item, dict):
-        return item["pubDate"]
+@router.get("/search")
+def search_feed(
+    search_term: str,
+    limit: int = 100,
+    offset: int = 0,
+    db: Session = Depends(get_read_db),
+):
+    """
+    Full-text search across the feed and the President's schedule, ordered by relevance.
+    "Quoted text" matches as a phrase; other words match as prefixes.
+    """
+    status = "error"
+    data = None
+    message = None
+    if not is_valid_bounds(limit, offset):
+        return formatted_response(status, data, INVALID_BOUNDS)
+
+    match_query = build_match_query(search_term)
+    matches = ranked_matches(db, match_query, limit, offset) if match_query else []
+
+    feed_ids = [item_id for kind, item_id in matches if kind == FEED_ITEM_KIND]
+    schedule_ids = [item_id for kind, item_id in matches if kind == PRESIDENT_SCHEDULE_KIND]
+    items = {}
+    # Matches can be in either tier
+    for model in (FeedItem, FeedItemArchive):
+        for item in db.query(model).filter(model.id.in_(feed_ids)):
+            items[(FEED_ITEM_KIND, item.id)] = format_feed_item(item)
+    for model in (PresidentSchedule, PresidentScheduleArchive):
+        for item in db.query(model).filter(model.id.in_(schedule_ids)):
+            items[(PRESIDENT_SCHEDULE_KIND, item.id)] = format_president_schedule_item(item)
+
+    ranked_items = [items[match] for match in matches if match in items]
+    if ranked_items:
+        status = "success"
+        data = ranked_items
     else:
-        return None
+        message = ITEMS_NOT_FOUND
+    return formatted_response(status, data, message)
+
+
+def format_feed_item(item):
+    return {field: getattr(item, field) for field in FEED_ITEM_FIELDS}
+
+
+def feed_item_payload(item):
+    """
+    The item's stored JSON if it has one, otherwise the formatted item.
+    """
+    if item.json_fragment is not None:
+        return JsonFragment(item.json_fragment)
+    return format_feed_item(item)
+
+
+def feed_item_sort_key(item):
+    return item.pubDate, item.source, item.id
+
+
+def president_schedule_sort_key(item):
+    return item.time, POTUS_SCHEDULE_SOURCE, item.id
 
 
 def format_president_schedule_item(item):
@@ -133,17 +378,21 @@ def format_president_schedule_item(item):
         "title": title,
         "link": item.link,
         "pubDate": item.time,
-        "source": "potus-schedule",
+        "source": POTUS_SCHEDULE_SOURCE,
         "updated_at": item.updated_at
     }
     return formatted_item
 
 
 @router.get("/legislative/session-info")
-async def get_congress_session_info(db: AsyncSession = Depends(get_db)):
+def get_congress_session_info(request: Request, db: Session = Depends(get_read_db)):
     """
     Returns the next meeting information for the House/Senate.
     """
+    return cached_response(request, lambda: session_info_response(db))
+
+
+def session_info_response(db):
     status = "error"
     data = None
     message = None
@@ -176,12 +425,16 @@ async def get_congress_session_info(db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/executive/potus-schedule/")
-async def get_potus_schedule(
-    limit: int = 100, offset: int = 0, db: AsyncSession = Depends(get_db)
+def get_potus_schedule(
+    request: Request, limit: int = 100, offset: int = 0, db: Session = Depends(get_read_db)
 ):
     """
     Returns the President's public schedule, with optional source filtering and pagination.
     """
+    return cached_response(request, lambda: potus_schedule_response(db, limit, offset))
+
+
+def potus_schedule_response(db, limit, offset):
     status = "error"
     data = None
     message = None
@@ -194,6 +447,16 @@ async def get_potus_schedule(
             .limit(limit)
             .all()
         )
+        if len(result) < limit and get_archived_before(db) is not None:
+            # Past the end of the hot table, so the page continues into the archive
+            hot_rows = db.query(func.count(PresidentSchedule.id)).scalar()
+            result += (
+                db.query(PresidentScheduleArchive)
+                .order_by(desc(PresidentScheduleArchive.time))
+                .offset(max(offset - hot_rows, 0))
+                .limit(limit - len(result))
+                .all()
+            )
     else:
         message = INVALID_BOUNDS
 
@@ -216,8 +479,35 @@ async def get_potus_schedule(
     return formatted_response(status, data, message)
 
 
-def formatted_response(status, data, message):
-    return {"status": status, "data": data, "message": message}
+@router.get("/healthz")
+def healthz():
+    """
+    Liveness check: the process is up and serving.
+    """
+    return formatted_response("success", None, None)
+
+
+@router.get("/readyz")
+def readyz(db: Session = Depends(get_read_db)):
+    """
+    Readiness check: reports how fresh the stored data is, and fails until
+    there is any data to serve.
+    """
+    newest_item = db.query(func.max(FeedItem.pubDate)).scalar()
+    data = {
+        "newest_item": newest_item,
+        "last_success": {
+            job: get_sync_state(db, last_success_key(job)) for job in INGEST_JOBS
+        },
+    }
+    if newest_item is None:
+        content = formatted_response("error", data, ITEMS_NOT_FOUND)
+        return FastJSONResponse(status_code=503, content=jsonable_encoder(content))
+    return formatted_response("success", data, None)
+
+
+def formatted_response(status, data, message, **extra):
+    return {"status": status, "data": data, "message": message, **extra}
 
 
 def is_valid_bounds(limit, offset):
@@ -227,6 +517,28 @@ def is_valid_bounds(limit, offset):
     return limit > 0 and offset >= 0
 
 
+def parse_date_range(from_date, to_date):
+    """
+    Parses the `from`/`to` parameters (ISO 8601 dates or datetimes) into a
+    [start, end) range of naive UTC datetimes; either end may be None. A plain `to`
+    date includes that whole day.
+    """
+    start = parse_datetime(from_date) if from_date else None
+    end = None
+    if to_date:
+        end = parse_datetime(to_date)
+        if len(to_date) == len("YYYY-MM-DD"):
+            end += timedelta(days=1)
+    return start, end
+
+
+def parse_datetime(value):
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
 def is_valid_date(search_term):
     pattern = r"^(January|February|March|April|May|June|July|August|September|October|November|December) \d{1,2}, \d{4}$"
     return re.match(pattern, search_term)
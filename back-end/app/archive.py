@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+import logging
+import os
+
+from app.crud import get_sync_state, set_sync_state
+from app.dedup import prune_signatures
+from app.models import FeedItem, FeedItemArchive, PresidentSchedule, PresidentScheduleArchive
+from app.writer import run_write
+
+# Rows older than this many days move to the archive tables; 0 disables archiving
+ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", 90))
+# Rows moved per write batch, so ingest writes can interleave with a large first run
+ARCHIVE_BATCH_SIZE = int(os.environ.get("ARCHIVE_BATCH_SIZE", 1000))
+ARCHIVE_INTERVAL_HOURS = int(os.environ.get("ARCHIVE_INTERVAL_HOURS", 24))
+
+# Everything dated before this is in the archive tables
+ARCHIVED_BEFORE_KEY = "archived-before"
+
+# (hot model, archive model, date column name)
+TIERS = [
+    (FeedItem, FeedItemArchive, "pubDate"),
+    (PresidentSchedule, PresidentScheduleArchive, "time"),
+]
+
+
+def archive_old_rows():
+    """
+    Moves rows older than ARCHIVE_AFTER_DAYS from the hot tables to the archives.
+    """
+    if ARCHIVE_AFTER_DAYS <= 0:
+        return
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=ARCHIVE_AFTER_DAYS)
+    try:
+        # Recorded first, so ingest stops re-adding rows while they're being moved
+        run_write(set_archived_before, cutoff)
+        for model, archive_model, date_column in TIERS:
+            moved = ARCHIVE_BATCH_SIZE
+            while moved == ARCHIVE_BATCH_SIZE:
+                moved = run_write(move_batch, model, archive_model, date_column, cutoff)
+        # Archived items are no longer near-duplicate candidates
+        run_write(prune_signatures, cutoff)
+    except Exception as e:
+        logging.error(f"An error occurred in archiving old rows: {e}")
+
+
+def move_batch(db: Session, model, archive_model, date_column: str, cutoff: datetime):
+    """
+    Moves up to ARCHIVE_BATCH_SIZE of the oldest rows dated before cutoff. Returns
+    how many were moved.
+    """
+    date = getattr(model, date_column)
+    batch = select(model.id).where(date < cutoff).order_by(date).limit(ARCHIVE_BATCH_SIZE)
+    rows = db.execute(
+        delete(model).where(model.id.in_(batch)).returning(*model.__table__.columns)
+    ).mappings().all()
+    if rows:
+        archived_columns = archive_model.__table__.columns.keys()
+        db.execute(
+            insert(archive_model),
+            [{name: row[name] for name in archived_columns} for row in rows],
+        )
+    return len(rows)
+
+
+def get_archived_before(db: Session):
+    """
+    Returns the date before which rows live in the archive tables, or None if
+    nothing has been archived.
+    """
+    value = get_sync_state(db, ARCHIVED_BEFORE_KEY)
+    return datetime.fromisoformat(value) if value else None
+
+
+def set_archived_before(db: Session, cutoff: datetime):
+    previous = get_archived_before(db)
+    # Never move the boundary back, or archived rows could be ingested again
+    if previous is None or cutoff > previous:
+        set_sync_state(db, ARCHIVED_BEFORE_KEY, cutoff.isoformat())
@@ -0,0 +1,177 @@
+from collections import OrderedDict
+from fastapi import Request, Response
+import hashlib
+import os
+import threading
+import time
+
+from app.crud import get_sync_state, set_sync_state
+from app.database import ReadSessionLocal
+from app.responses import COMPRESSION_MIN_SIZE, compress, negotiate_encoding, render_json
+
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", 256))
+RESPONSE_CACHE_TTL = int(os.environ.get("RESPONSE_CACHE_TTL", 300))  # seconds
+CACHE_MAX_AGE = int(os.environ.get("CACHE_MAX_AGE", 60))  # seconds browsers/CDNs may reuse a response
+
+# How often the stored generation is re-read; ingest may run in another process
+GENERATION_CHECK_INTERVAL = float(os.environ.get("GENERATION_CHECK_INTERVAL", 2))  # seconds
+
+# Bumped in sync_state by the ingest jobs whenever they commit new rows; cached
+# responses from an older generation are stale.
+GENERATION_KEY = "generation"
+
+_generation = 0
+_generation_checked_at = None
+_generation_lock = threading.Lock()
+
+
+def bump_generation(db):
+    """
+    Increments the stored generation as part of an ingest write batch.
+    """
+    set_sync_state(db, GENERATION_KEY, str(int(get_sync_state(db, GENERATION_KEY) or 0) + 1))
+
+
+def current_generation():
+    """
+    The stored generation, re-read at most every GENERATION_CHECK_INTERVAL seconds.
+    """
+    global _generation, _generation_checked_at
+    with _generation_lock:
+        now = time.monotonic()
+        if _generation_checked_at is None or now - _generation_checked_at >= GENERATION_CHECK_INTERVAL:
+            with ReadSessionLocal() as db:
+                _generation = int(get_sync_state(db, GENERATION_KEY) or 0)
+            _generation_checked_at = now
+        return _generation
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU of serialized responses, bounded by size and TTL and
+    invalidated by the ingest generation. Each entry keeps its body per content
+    encoding (None for uncompressed), so each one is only compressed once.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        # Read outside the lock, since it may query the database
+        current = current_generation()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            generation, expires_at, etag, bodies = entry
+            if generation != current or expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return etag, bodies
+
+    def set(self, key, generation, etag, bodies):
+        with self.lock:
+            self.entries[key] = (generation, time.monotonic() + self.ttl, etag, bodies)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
+
+
+def cache_key(request: Request):
+    """
+    Normalizes a request into a cache key: parameters the route doesn't declare or
+    that are at their default are dropped, and the remaining ones (and
+    comma-separated sources) are sorted, so /feed and /feed?limit=100 share an entry.
+    """
+    route = request.scope.get("route")
+    defaults = {field.alias: field.default for field in route.dependant.query_params} if route else {}
+    params = []
+    for name, value in request.query_params.multi_items():
+        if route and name not in defaults:
+            continue
+        default = defaults.get(name)
+        if default is not None:
+            value = canonical_value(value, default)
+            if value == canonical_value(str(default), default):
+                continue
+        if not value:
+            continue
+        if name == "sources":
+            value = ",".join(sorted(value.split(",")))
+        params.append((name, value))
+    return request.url.path, tuple(sorted(params))
+
+
+def canonical_value(value: str, default):
+    """
+    Spells a query parameter's value one way per meaning, going by the type of its default.
+    """
+    if isinstance(default, bool):
+        return "true" if value.lower() in ("1", "true", "t", "on", "yes", "y") else "false"
+    if isinstance(default, int):
+        try:
+            return str(int(value))
+        except ValueError:
+            return value
+    return value
+
+
+def cached_response(request: Request, build, render=render_json, media_type="application/json"):
+    """
+    Returns the cached response for this request, calling build() to produce the
+    response content and render() to serialize it on a miss. Responses carry an ETag
+    and Cache-Control so clients and CDNs can revalidate, and matching If-None-Match
+    requests get a 304. Bodies are compressed with gzip or brotli when the client
+    accepts it.
+    """
+    key = cache_key(request)
+    entry = response_cache.get(key)
+    if entry is None:
+        # Read the generation first so a concurrent ingest can't be cached as current
+        generation = current_generation()
+        body = render(build())
+        etag = f'W/"{hashlib.sha1(body).hexdigest()}"'
+        bodies = {None: body}
+        response_cache.set(key, generation, etag, bodies)
+    else:
+        etag, bodies = entry
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={CACHE_MAX_AGE}",
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+
+    encoding = None
+    if len(bodies[None]) >= COMPRESSION_MIN_SIZE:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    if encoding not in bodies:
+        bodies[encoding] = compress(bodies[None], encoding)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=bodies[encoding], media_type=media_type, headers=headers)
+
+
+def etag_matches(if_none_match: str, etag: str):
+    """
+    Whether an If-None-Match header lists etag (or is "*"), using the weak
+    comparison that applies to If-None-Match.
+    """
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag.removeprefix("W/"):
+            return True
+    return False
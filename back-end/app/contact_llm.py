@@ -1,17 +1,70 @@
 from openai import OpenAI
+from datetime import timedelta
+import hashlib
 import os
+import threading
 
-def send_prompt(prompt: str):
-    openai = OpenAI(
-        api_key=os.environ["DEEPINFRA_API_KEY"],
-        base_url="https://api.deepinfra.com/v1/openai",
-    )
-
-    chat_completion = openai.chat.completions.create(
-        model="meta-llama/Meta-Llama-3.1-70B-Instruct",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0,
-    )
-    return chat_completion.choices[
+from app.crud import get_read_db, get_cached_llm_response, store_llm_response
+from app.metrics import LLM_CACHE_HITS, LLM_CACHE_MISSES, LLM_SECONDS
+from app.utils import current_time
+from app.writer import run_write
+
+LLM_MODEL = "meta-llama/Meta-Llama-3.1-70B-Instruct"
+LLM_CACHE_TTL = int(os.environ.get("LLM_CACHE_TTL", 6 * 60 * 60))  # seconds
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", 60))  # seconds
+
+# Prompt-result cache counters, for monitoring how many LLM round trips are saved
+llm_cache_stats = {"hits": 0, "misses": 0}
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Returns the shared OpenAI client, so its HTTP connection pool is reused across calls.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OpenAI(
+                api_key=os.environ["DEEPINFRA_API_KEY"],
+                base_url="https://api.deepinfra.com/v1/openai",
+                timeout=LLM_TIMEOUT,
+            )
+    return _client
+
+
+def send_prompt(prompt: str, parse=str):
+    """
+    Sends a prompt to the LLM and returns parse(answer), reusing the stored answer if
+    the same prompt was sent to the same model within LLM_CACHE_TTL. Answers that
+    parse raises on aren't stored, so the next call asks again.
+    """
+    prompt_hash = hashlib.sha256(f"{LLM_MODEL}\n{prompt}".encode()).hexdigest()
+    db = next(get_read_db())
+    try:
+        fresh_after = current_time() - timedelta(seconds=LLM_CACHE_TTL)
+        cached = get_cached_llm_response(db, prompt_hash, fresh_after)
+    finally:
+        db.close()
+    if cached is not None:
+        llm_cache_stats["hits"] += 1
+        LLM_CACHE_HITS.inc()
+        return parse(cached)
+    llm_cache_stats["misses"] += 1
+    LLM_CACHE_MISSES.inc()
+
+    with LLM_SECONDS.time():
+        chat_completion = get_client().chat.completions.create(
+            model=LLM_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0,
+        )
+    response = chat_completion.choices[
         0
     ].message.content.strip()  # The API returns a leading whitespace
+
+    parsed = parse(response)
+    run_write(store_llm_response, prompt_hash, LLM_MODEL, response)
+    return parsed
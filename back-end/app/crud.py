@@ -1,11 +1,18 @@
+from sqlalchemy import func, select, text, update
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+import hashlib
 import logging
-from app.models import SessionInfo, FeedItem, PresidentSchedule
-from app.database import SessionLocal
+from app.models import SessionInfo, FeedItem, FeedItemArchive, PresidentSchedule, PresidentScheduleArchive, HttpCache, SyncState, LlmCache, SourceSchedule, LshBucket, MinHashSignature
+from app.database import ReadSessionLocal, SessionLocal, add_column_if_missing, create_missing_indexes, enable_autoincrement
+from app.responses import STORE_JSON_FRAGMENTS, feed_item_fragment
+from app.dedup import assign_clusters
+from app.histogram import create_daily_counts
+from app.search import create_search_index
 from datetime import datetime
 import pytz
-from app.utils import current_time
+from app.utils import current_time, content_hash
 
 # Constants
 SENATE_SOURCE = "senateppg-twitter"
@@ -15,21 +22,193 @@ def get_db():
     with SessionLocal() as db:
         yield db
 
-def add_feed_item(db: Session, feed_items: dict):
-    for item in feed_items:
-        title, pubDate, link = item["title"], item["pubDate"], item["link"]
-        existing_item = (
-            db.query(FeedItem).filter_by(title=title, pubDate=pubDate, link=link).first()
+def get_read_db():
+    with ReadSessionLocal() as db:
+        yield db
+
+def add_feed_item(db: Session, feed_items: list, archived_before=None, cluster=True):
+    """
+    Bulk-inserts feed items, skipping any that are already stored, and clusters the
+    new ones with their near-duplicates. Items dated before archived_before go
+    straight to the archive. Bulk loads can pass cluster=False and leave clustering
+    to the background job. Returns the number of rows actually inserted.
+    """
+    if not feed_items:
+        return 0
+    now = current_time()
+    rows = [
+        {**item, "item_hash": feed_item_hash(item), "created_at": now, "updated_at": now}
+        for item in feed_items
+    ]
+    if STORE_JSON_FRAGMENTS:
+        for row in rows:
+            row["json_fragment"] = feed_item_fragment(row)
+    archived_rows = [row for row in rows if is_before(row["pubDate"], archived_before)]
+    rows = [row for row in rows if not is_before(row["pubDate"], archived_before)]
+    inserted_count = add_archived_feed_items(db, archived_rows) if archived_rows else 0
+    if not rows:
+        return inserted_count
+
+    statement = (
+        insert(FeedItem)
+        .on_conflict_do_nothing(index_elements=["item_hash"])
+        .returning(FeedItem.id, FeedItem.item_hash)
+    )
+    inserted = db.execute(statement, rows).all()
+    if cluster:
+        rows_by_hash = {row["item_hash"]: row for row in rows}
+        assign_clusters(db, [{**rows_by_hash[item_hash], "id": item_id} for item_id, item_hash in inserted])
+    return inserted_count + len(inserted)
+
+
+def add_archived_feed_items(db: Session, rows: list):
+    """
+    Inserts feed item rows into the archive, skipping any already stored in either
+    tier. Returns the number inserted.
+    """
+    hashes = [row["item_hash"] for row in rows]
+    stored = set(db.scalars(select(FeedItem.item_hash).where(FeedItem.item_hash.in_(hashes))))
+    stored.update(
+        db.scalars(select(FeedItemArchive.item_hash).where(FeedItemArchive.item_hash.in_(hashes)))
+    )
+    new_rows = list({row["item_hash"]: row for row in rows if row["item_hash"] not in stored}.values())
+    if new_rows:
+        first_id = reserve_ids(db, FeedItem, FeedItemArchive, len(new_rows))
+        db.execute(
+            insert(FeedItemArchive),
+            [{**row, "id": first_id + i} for i, row in enumerate(new_rows)],
+        )
+    return len(new_rows)
+
+
+def reserve_ids(db: Session, model, archive_model, count: int):
+    """
+    Takes count ids from the hot table's AUTOINCREMENT sequence for rows inserted
+    straight into its archive, so the two tiers never share an id. Returns the first.
+    """
+    table = model.__tablename__
+    sequence = db.execute(
+        text("SELECT seq FROM sqlite_sequence WHERE name = :name"), {"name": table}
+    ).scalar()
+    highest = max(
+        sequence or 0,
+        db.query(func.max(model.id)).scalar() or 0,
+        db.query(func.max(archive_model.id)).scalar() or 0,
+    )
+    if sequence is None:
+        db.execute(
+            text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"),
+            {"name": table, "seq": highest + count},
+        )
+    else:
+        db.execute(
+            text("UPDATE sqlite_sequence SET seq = :seq WHERE name = :name"),
+            {"name": table, "seq": highest + count},
+        )
+    return highest + 1
+
+
+def is_before(date: datetime, cutoff):
+    """
+    Whether a row with this date belongs in the archive, given the archive's cutoff.
+    """
+    return cutoff is not None and date.replace(tzinfo=None) < cutoff
+
+
+def feed_item_hash(item: dict):
+    """
+    Natural key of a feed item: a hash of its link, publication date and title.
+    """
+    key = "\n".join([item["link"] or "", item["pubDate"].isoformat(), item["title"] or ""])
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def upgrade_schema(db: Session):
+    """
+    Brings databases created by older versions up to date with the models.
+    """
+    add_column_if_missing("feed_items", "item_hash", "VARCHAR")
+    add_column_if_missing("feed_items", "json_fragment", "BLOB")
+    add_column_if_missing("feed_items", "cluster_id", "INTEGER")
+    add_column_if_missing("feed_items_archive", "cluster_id", "INTEGER")
+    add_column_if_missing("lsh_buckets", "pubDate", "DATETIME")
+    # Rebuilding drops the indexes and triggers, which are recreated below
+    enable_autoincrement(FeedItem.__table__, FeedItemArchive.__table__)
+    enable_autoincrement(PresidentSchedule.__table__, PresidentScheduleArchive.__table__)
+
+    # Backfill natural keys, dropping any duplicates stored before they were enforced
+    seen, updates, duplicates = set(), [], []
+    rows = (
+        db.query(FeedItem.id, FeedItem.title, FeedItem.pubDate, FeedItem.link)
+        .filter(FeedItem.item_hash.is_(None))
+        .order_by(FeedItem.id)
+    )
+    for row in rows:
+        item_hash = feed_item_hash(row._asdict())
+        if item_hash in seen:
+            duplicates.append(row.id)
+        else:
+            seen.add(item_hash)
+            updates.append({"id": row.id, "item_hash": item_hash})
+    if duplicates:
+        db.query(FeedItem).filter(FeedItem.id.in_(duplicates)).delete(synchronize_session=False)
+    if updates:
+        db.execute(update(FeedItem), updates)
+    db.commit()
+
+    create_missing_indexes(FeedItem.__table__)
+    create_missing_indexes(FeedItemArchive.__table__)
+
+    # Schedule rows are unique on (time, location, description); NULLs would slip past that
+    db.query(PresidentSchedule).filter(PresidentSchedule.location.is_(None)).update(
+        {PresidentSchedule.location: ""}, synchronize_session=False
+    )
+    db.query(PresidentSchedule).filter(PresidentSchedule.description.is_(None)).update(
+        {PresidentSchedule.description: ""}, synchronize_session=False
+    )
+    first_ids = (
+        db.query(func.min(PresidentSchedule.id))
+        .group_by(PresidentSchedule.time, PresidentSchedule.location, PresidentSchedule.description)
+    )
+    db.query(PresidentSchedule).filter(PresidentSchedule.id.not_in(first_ids)).delete(
+        synchronize_session=False
+    )
+    db.commit()
+
+    create_missing_indexes(PresidentSchedule.__table__)
+
+    # Buckets stored before they carried their item's date
+    db.execute(
+        update(LshBucket)
+        .where(LshBucket.pubDate.is_(None))
+        .values(
+            pubDate=select(MinHashSignature.pubDate)
+            .where(MinHashSignature.feed_item_id == LshBucket.feed_item_id)
+            .scalar_subquery()
         )
-        if existing_item:
-            continue
-        new_item = FeedItem(**item, created_at=current_time(), updated_at=current_time())
-        db.add(new_item)
+    )
+    db.commit()
+    create_missing_indexes(LshBucket.__table__)
+
+    create_search_index(db)
+    create_daily_counts(db)
 
 
 def update_meeting_info(
     db: Session, chamber: str, in_session: int, next_meeting=None, live_link: str = None
 ):
+    """
+    Stores a chamber's session information. Returns False, writing nothing, if it's
+    unchanged.
+    """
+    if next_meeting is not None and next_meeting.tzinfo is not None:
+        # SQLite hands back naive UTC datetimes
+        next_meeting = next_meeting.astimezone(pytz.utc).replace(tzinfo=None)
+    stored = db.query(SessionInfo).filter_by(chamber=chamber).first()
+    if stored is not None and (stored.in_session, stored.meeting_date, stored.live_link) == (
+        in_session, next_meeting, live_link
+    ):
+        return False
 
     session_info = db.query(SessionInfo).filter_by(chamber=chamber).delete()
     new_item = SessionInfo(
@@ -41,21 +220,145 @@ def update_meeting_info(
         updated_at=current_time()
     )
     db.add(new_item)
+    return True
 
 
-def update_president_schedule(db: Session, president_schedule: dict):
-    time, location, description = (
-        president_schedule["time"],
-        president_schedule["location"],
-        president_schedule["description"],
-    )
-    existing_item = (
-        db.query(PresidentSchedule)
-        .filter_by(time=time, location=location, description=description)
-        .first()
-    )
-    if existing_item:
-        return
+def sync_president_schedule(db: Session, schedule_items, since=None, archived_before=None):
+    """
+    Diffs parsed schedule entries against the stored rows (from `since` onwards) by
+    natural key in one pass, then bulk-inserts new entries and bulk-updates changed ones.
+    New entries dated before archived_before go straight to the archive. Returns the
+    number of rows written.
+    """
+    stored = {}
+    models = [PresidentSchedule] if archived_before is None else [PresidentSchedule, PresidentScheduleArchive]
+    for model in models:
+        query = db.query(
+            model.id,
+            model.time,
+            model.location,
+            model.description,
+            model.link,
+            model.press_information,
+        )
+        if since is not None:
+            query = query.filter(model.time >= since)
+        for row in query:
+            stored[(row.time, row.location, row.description)] = (model, row)
 
-    new_item = PresidentSchedule(**president_schedule, created_at=current_time(), updated_at=current_time())
-    db.add(new_item)
+    now = current_time()
+    new_items, archived_items = {}, {}
+    changed_items = {model: [] for model in models}
+    for item in schedule_items:
+        key = (item["time"].replace(tzinfo=None), item["location"], item["description"])
+        model, existing = stored.get(key, (None, None))
+        if existing is None:
+            new = archived_items if is_before(item["time"], archived_before) else new_items
+            new[key] = {**item, "created_at": now, "updated_at": now}
+        elif (existing.link, existing.press_information) != (item["link"], item["press_information"]):
+            changed_items[model].append(
+                {
+                    "id": existing.id,
+                    "link": item["link"],
+                    "press_information": item["press_information"],
+                    "updated_at": now,
+                }
+            )
+
+    if new_items:
+        db.execute(
+            insert(PresidentSchedule).on_conflict_do_nothing(),
+            list(new_items.values()),
+        )
+    if archived_items:
+        first_id = reserve_ids(db, PresidentSchedule, PresidentScheduleArchive, len(archived_items))
+        db.execute(
+            insert(PresidentScheduleArchive),
+            [{**item, "id": first_id + i} for i, item in enumerate(archived_items.values())],
+        )
+    for model, items in changed_items.items():
+        if items:
+            db.execute(update(model), items)
+    return len(new_items) + len(archived_items) + sum(map(len, changed_items.values()))
+
+
+def get_sync_state(db: Session, key: str):
+    state = db.get(SyncState, key)
+    return state.value if state else None
+
+
+def set_sync_state(db: Session, key: str, value: str):
+    state = db.get(SyncState, key)
+    if state is None:
+        state = SyncState(key=key, created_at=current_time())
+        db.add(state)
+    state.value = value
+    state.updated_at = current_time()
+
+
+def get_source_schedules(db: Session):
+    """
+    Returns each feed's polling state, keyed by source.
+    """
+    return {schedule.source: schedule for schedule in db.query(SourceSchedule)}
+
+
+def update_source_schedule(db: Session, source: str, **fields):
+    schedule = db.get(SourceSchedule, source)
+    if schedule is None:
+        schedule = SourceSchedule(source=source, created_at=current_time())
+        db.add(schedule)
+    for name, value in fields.items():
+        setattr(schedule, name, value)
+    schedule.updated_at = current_time()
+
+
+def get_cached_llm_response(db: Session, prompt_hash: str, fresh_after: datetime):
+    """
+    Returns the stored LLM answer for a prompt hash if it was stored after fresh_after.
+    """
+    cached = db.get(LlmCache, prompt_hash)
+    # SQLite hands back naive UTC datetimes
+    if cached is None or cached.updated_at < fresh_after.replace(tzinfo=None):
+        return None
+    return cached.response
+
+
+def store_llm_response(db: Session, prompt_hash: str, model: str, response: str):
+    cached = db.get(LlmCache, prompt_hash)
+    if cached is None:
+        cached = LlmCache(prompt_hash=prompt_hash, created_at=current_time())
+        db.add(cached)
+    cached.model = model
+    cached.response = response
+    cached.updated_at = current_time()
+
+
+def get_http_validators(db: Session, urls: list):
+    """
+    Returns the cached ETag/Last-Modified/content hash for each URL, keyed by URL.
+    """
+    cached = db.query(HttpCache).filter(HttpCache.url.in_(urls)).all()
+    return {
+        item.url: {
+            "etag": item.etag,
+            "last_modified": item.last_modified,
+            "content_hash": item.content_hash,
+        }
+        for item in cached
+    }
+
+
+def update_http_validators(db: Session, url: str, response, body_hash=None):
+    """
+    Stores the validators of a successfully processed response. body_hash is the
+    content_hash of a streamed body, which isn't kept on the response.
+    """
+    cached = db.get(HttpCache, url)
+    if cached is None:
+        cached = HttpCache(url=url, created_at=current_time())
+        db.add(cached)
+    cached.etag = response.headers.get("ETag")
+    cached.last_modified = response.headers.get("Last-Modified")
+    cached.content_hash = body_hash or content_hash(response.content)
+    cached.updated_at = current_time()
@@ -1,12 +1,114 @@
-from sqlalchemy import create_engine
+from sqlalchemy import MetaData, create_engine, event
+from sqlalchemy.schema import CreateTable
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 
 DATABASE_URL = os.environ['DB_FILENAME']  # SQLite database URL
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# Routes are sync and run on FastAPI's threadpool; each thread needs its own connection
+API_THREADPOOL_SIZE = int(os.environ.get("API_THREADPOOL_SIZE", 20))
+
+# Per-connection SQLite tuning
+SQLITE_CACHE_SIZE_KIB = int(os.environ.get("SQLITE_CACHE_SIZE_KIB", 64 * 1024))
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))  # bytes
+SQLITE_BUSY_TIMEOUT = int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000))  # milliseconds
+
+# Writes (ingest jobs, migrations) go through this engine. In WAL mode readers work
+# from a snapshot and never wait on it.
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False},
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Read-only connections for the API
+read_engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    pool_size=API_THREADPOOL_SIZE,
+)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
 Base = declarative_base()
 
+
+def tune_connection(dbapi_connection):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT}")
+    # Negative values are in KiB rather than pages
+    cursor.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KIB}")
+    cursor.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+    cursor.close()
+
+
+@event.listens_for(engine, "connect")
+def configure_writer(dbapi_connection, connection_record):
+    tune_connection(dbapi_connection)
+    cursor = dbapi_connection.cursor()
+    # WAL is persistent in the database file; NORMAL is durable across crashes in WAL mode
+    cursor.execute("PRAGMA journal_mode = WAL")
+    cursor.execute("PRAGMA synchronous = NORMAL")
+    cursor.close()
+
+
+@event.listens_for(read_engine, "connect")
+def configure_reader(dbapi_connection, connection_record):
+    tune_connection(dbapi_connection)
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA query_only = ON")
+    cursor.close()
+
+
+def add_column_if_missing(table, column, column_type):
+    """
+    create_all() doesn't alter existing tables, so columns added to a model after
+    the database was created are added here.
+    """
+    with engine.begin() as conn:
+        columns = [row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")]
+        if column not in columns:
+            conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+
+def create_missing_indexes(table):
+    """
+    Creates any index declared on the model that an existing table doesn't have yet.
+    """
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+
+def enable_autoincrement(table, archive_table):
+    """
+    Makes sure the table never reuses an id, including ids of rows moved to
+    archive_table. SQLite can't add AUTOINCREMENT to an existing table, so tables
+    created without it are rebuilt; the caller recreates their indexes and triggers.
+    """
+    with engine.begin() as conn:
+        sql = conn.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table.name,)
+        ).scalar()
+        if "AUTOINCREMENT" not in sql.upper():
+            rebuilt = table.to_metadata(MetaData(), name=f"{table.name}_rebuilt")
+            columns = ", ".join(f'"{name}"' for name in table.columns.keys())
+            conn.execute(CreateTable(rebuilt))
+            conn.exec_driver_sql(
+                f"INSERT INTO {rebuilt.name} ({columns}) SELECT {columns} FROM {table.name}"
+            )
+            conn.exec_driver_sql(f"DROP TABLE {table.name}")
+            conn.exec_driver_sql(f"ALTER TABLE {rebuilt.name} RENAME TO {table.name}")
+
+        # New ids start above every id already used in either tier
+        highest_id = conn.exec_driver_sql(
+            f"SELECT max(id) FROM (SELECT max(id) AS id FROM {table.name} "
+            f"UNION ALL SELECT max(id) FROM {archive_table.name})"
+        ).scalar()
+        if highest_id is not None:
+            updated = conn.exec_driver_sql(
+                "UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = ?", (highest_id, table.name)
+            ).rowcount
+            if not updated:
+                conn.exec_driver_sql(
+                    "INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table.name, highest_id)
+                )
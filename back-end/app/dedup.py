@@ -0,0 +1,245 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import islice
+from sqlalchemy import and_, bindparam, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+import hashlib
+import json
+import os
+import re
+import struct
+
+from app.models import FeedItem, LshBucket, MinHashSignature
+
+# Items whose titles' estimated Jaccard similarity is at least this are near-duplicates
+DEDUP_THRESHOLD = float(os.environ.get("DEDUP_THRESHOLD", 0.7))
+# Only items published within this many days of each other are compared, so
+# recurring titles ("Press Briefing") aren't merged across weeks
+DEDUP_WINDOW_DAYS = int(os.environ.get("DEDUP_WINDOW_DAYS", 7))
+# Most candidates compared per new item, which bounds the cost of crowded buckets
+DEDUP_MAX_CANDIDATES = int(os.environ.get("DEDUP_MAX_CANDIDATES", 50))
+# Shingles whose hash values are kept in memory (about 2.5 KB each)
+DEDUP_SHINGLE_CACHE_SIZE = int(os.environ.get("DEDUP_SHINGLE_CACHE_SIZE", 4096))
+# Items clustered per write batch by the background job that clusters bulk-loaded items
+DEDUP_BATCH_SIZE = int(os.environ.get("DEDUP_BATCH_SIZE", 1000))
+
+# Changing these invalidates the stored signatures and buckets
+SHINGLE_SIZE = 5  # characters
+LSH_BANDS = 16
+LSH_ROWS = 4  # signature values per band; bands * rows is the signature length
+MINHASH_PERMUTATIONS = LSH_BANDS * LSH_ROWS
+
+# Each keyed 64-byte BLAKE2b digest of a shingle gives 16 of its hash values
+_HASH_KEYS = [f"minhash-{i}".encode() for i in range(MINHASH_PERMUTATIONS // 16)]
+_SIGNATURE_FORMAT = f"<{MINHASH_PERMUTATIONS}I"
+
+_URL = re.compile(r"https?://\S+")
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def shingles(title: str):
+    """
+    The set of SHINGLE_SIZE-character substrings of the normalized title. Links are
+    dropped, so mirrors that rewrite them (nitter vs twitter) still match.
+    """
+    text = _NON_WORD.sub(" ", _URL.sub(" ", title or "").lower()).strip()
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash(title: str):
+    """
+    The title's MinHash signature, or None if it has no text to compare.
+    """
+    hashes = [shingle_hashes(shingle) for shingle in shingles(title)]
+    if not hashes:
+        return None
+    return tuple(map(min, zip(*hashes)))
+
+
+# Titles reuse the same words, so most shingles have been hashed before
+@lru_cache(maxsize=DEDUP_SHINGLE_CACHE_SIZE)
+def shingle_hashes(shingle: str):
+    """
+    The shingle's MINHASH_PERMUTATIONS hash values.
+    """
+    return struct.unpack(
+        _SIGNATURE_FORMAT,
+        b"".join(hashlib.blake2b(shingle.encode(), key=key).digest() for key in _HASH_KEYS),
+    )
+
+
+def band_buckets(signature):
+    """
+    The LSH bucket of each band of a signature. Near-duplicates share at least one
+    with high probability, so candidates are found with a few index lookups.
+    """
+    buckets = []
+    for band in range(LSH_BANDS):
+        rows = struct.pack(f"<I{LSH_ROWS}I", band, *signature[band * LSH_ROWS:(band + 1) * LSH_ROWS])
+        digest = hashlib.blake2b(rows, digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, "little", signed=True))
+    return buckets
+
+
+def similarity(signature, other):
+    """
+    Estimated Jaccard similarity of the titles behind two signatures.
+    """
+    return sum(x == y for x, y in zip(signature, other)) / MINHASH_PERMUTATIONS
+
+
+def assign_clusters(db: Session, items):
+    """
+    Indexes newly inserted feed items (dicts with id, title and pubDate) and sets
+    each one's cluster_id to the cluster of its closest near-duplicate, or its own
+    id if it has none. The candidates of the whole batch are found with one lookup.
+    """
+    window = timedelta(days=DEDUP_WINDOW_DAYS)
+    signed = {}
+    for item in items:
+        signature = minhash(item["title"])
+        if signature is not None:
+            signed[item["id"]] = (naive_utc(item["pubDate"]), signature, band_buckets(signature))
+    stored_candidates = find_candidates(db, signed, window)
+
+    clusters = {}
+    # Items earlier in this batch are matched in memory and stored together at the end
+    batch_signatures, batch_buckets = {}, defaultdict(list)
+    for item in items:
+        cluster_id = item["id"]
+        if item["id"] in signed:
+            pub_date, signature, buckets = signed[item["id"]]
+            candidates = list(stored_candidates[item["id"]])
+            batch_candidates = dict.fromkeys(
+                item_id for bucket in buckets for item_id in batch_buckets[bucket][-DEDUP_MAX_CANDIDATES:]
+            )
+            for candidate_id in islice(batch_candidates, DEDUP_MAX_CANDIDATES):
+                candidate_date, candidate_signature = batch_signatures[candidate_id]
+                if abs(candidate_date - pub_date) <= window:
+                    candidates.append((candidate_id, candidate_signature, None))
+            best = DEDUP_THRESHOLD
+            for candidate_id, candidate_signature, candidate_cluster in candidates:
+                score = similarity(signature, candidate_signature)
+                if score >= best:
+                    best = score
+                    cluster_id = clusters.get(candidate_id) or candidate_cluster or candidate_id
+            batch_signatures[item["id"]] = (pub_date, signature)
+            for bucket in buckets:
+                batch_buckets[bucket].append(item["id"])
+        clusters[item["id"]] = cluster_id
+
+    if batch_signatures:
+        db.execute(
+            insert(MinHashSignature),
+            [
+                {
+                    "feed_item_id": item_id,
+                    "pubDate": pub_date,
+                    "signature": struct.pack(_SIGNATURE_FORMAT, *signature),
+                }
+                for item_id, (pub_date, signature) in batch_signatures.items()
+            ],
+        )
+        db.execute(
+            insert(LshBucket),
+            [
+                {"bucket": bucket, "feed_item_id": item_id, "pubDate": batch_signatures[item_id][0]}
+                for bucket, item_ids in batch_buckets.items()
+                for item_id in item_ids
+            ],
+        )
+    if clusters:
+        db.execute(
+            update(FeedItem),
+            [{"id": item_id, "cluster_id": cluster_id} for item_id, cluster_id in clusters.items()],
+        )
+
+
+def find_candidates(db: Session, signed, window: timedelta):
+    """
+    Stored items sharing a bucket with each signed item ({id: (pubDate, signature,
+    buckets)}) and published within window of it, as {id: [(candidate id, signature,
+    cluster id)]}, at most DEDUP_MAX_CANDIDATES each. Every (bucket, date range) probe
+    is one seek on the lsh_buckets index, and all of them go in a single query.
+    """
+    candidates = defaultdict(list)
+    if not signed:
+        return candidates
+    probes = []
+    for item_id, (pub_date, _, buckets) in signed.items():
+        start, end = db_datetime(pub_date - window), db_datetime(pub_date + window)
+        probes.extend([item_id, bucket, start, end] for bucket in buckets)
+    probe = func.json_each(bindparam("probes")).table_valued("value").alias("probe")
+    query = (
+        select(
+            func.json_extract(probe.c.value, "$[0]"),
+            LshBucket.feed_item_id,
+            MinHashSignature.signature,
+            FeedItem.cluster_id,
+        )
+        .select_from(probe)
+        .join(
+            LshBucket,
+            and_(
+                LshBucket.bucket == func.json_extract(probe.c.value, "$[1]"),
+                LshBucket.pubDate.between(
+                    func.json_extract(probe.c.value, "$[2]"), func.json_extract(probe.c.value, "$[3]")
+                ),
+            ),
+        )
+        .join(MinHashSignature, MinHashSignature.feed_item_id == LshBucket.feed_item_id)
+        .join(FeedItem, FeedItem.id == LshBucket.feed_item_id)
+        .distinct()
+    )
+    signatures = {}
+    for item_id, candidate_id, candidate_signature, candidate_cluster in db.execute(
+        query, {"probes": json.dumps(probes)}
+    ):
+        if len(candidates[item_id]) < DEDUP_MAX_CANDIDATES:
+            if candidate_id not in signatures:
+                signatures[candidate_id] = struct.unpack(_SIGNATURE_FORMAT, candidate_signature)
+            candidates[item_id].append((candidate_id, signatures[candidate_id], candidate_cluster))
+    return candidates
+
+
+def cluster_unclustered_items(db: Session, limit: int):
+    """
+    Clusters up to limit of the hot feed items stored without clustering, oldest
+    first. Returns how many were clustered.
+    """
+    rows = (
+        db.query(FeedItem.id, FeedItem.title, FeedItem.pubDate)
+        .filter(FeedItem.cluster_id.is_(None))
+        .order_by(FeedItem.id)
+        .limit(limit)
+        .all()
+    )
+    assign_clusters(db, [row._asdict() for row in rows])
+    return len(rows)
+
+
+def prune_signatures(db: Session, cutoff: datetime):
+    """
+    Drops the signatures and buckets of items published before cutoff, which new
+    items are too far apart from to be compared with.
+    """
+    old_ids = select(MinHashSignature.feed_item_id).where(MinHashSignature.pubDate < cutoff)
+    db.execute(delete(LshBucket).where(LshBucket.feed_item_id.in_(old_ids)))
+    db.execute(delete(MinHashSignature).where(MinHashSignature.pubDate < cutoff))
+
+
+def naive_utc(value: datetime):
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def db_datetime(value: datetime):
+    """
+    The value as SQLAlchemy stores DateTime columns in SQLite, for comparing with
+    them inside SQL expressions it doesn't convert.
+    """
+    return value.strftime("%Y-%m-%d %H:%M:%S.%f")
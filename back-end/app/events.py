@@ -0,0 +1,144 @@
+from fastapi import APIRouter, Header, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import json
+import os
+
+from app.api import (
+    POTUS_SCHEDULE_SOURCE,
+    format_feed_item,
+    format_president_schedule_item,
+    session_info_response,
+)
+from app.cache import current_generation
+from app.database import ReadSessionLocal
+from app.models import FeedItem, PresidentSchedule
+
+# How often open streams check for a new ingest generation, in seconds
+STREAM_POLL_INTERVAL = float(os.environ.get("STREAM_POLL_INTERVAL", 2))
+# Comment lines sent on idle streams so proxies don't close them, in seconds
+STREAM_KEEPALIVE_INTERVAL = 15
+# Most rows sent per table per check; a bigger backlog is sent over the following checks
+STREAM_BATCH_SIZE = 200
+
+router = APIRouter()
+
+
+@router.get("/feed/stream")
+async def stream_feed(
+    request: Request,
+    sources: str = "",
+    last_event_id: str = Header(default=""),
+):
+    """
+    Streams new feed items (and session info changes) as Server-Sent Events, with
+    optional filtering by sources. Reconnecting clients resume from Last-Event-ID.
+    """
+    source_list = sources.split(",") if sources else []
+    return StreamingResponse(
+        event_stream(request, last_event_id, source_list),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def parse_event_id(event_id: str):
+    """
+    Event ids are "<last feed item id>-<last schedule id>". Returns None if malformed.
+    """
+    try:
+        feed_id, schedule_id = event_id.split("-")
+        return int(feed_id), int(schedule_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def latest_ids():
+    with ReadSessionLocal() as db:
+        feed_id = db.query(func.max(FeedItem.id)).scalar() or 0
+        schedule_id = db.query(func.max(PresidentSchedule.id)).scalar() or 0
+    return feed_id, schedule_id
+
+
+def format_event(event: str, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(jsonable_encoder(data))}")
+    return "\n".join(lines) + "\n\n"
+
+
+def read_new_events(last_ids, source_list, session_info):
+    """
+    Reads rows inserted after last_ids and the current session info, returning the
+    formatted events, the new last ids, the session info, and whether rows were left over.
+    """
+    feed_id, schedule_id = last_ids
+    events = []
+    with ReadSessionLocal() as db:
+        feed_query = db.query(FeedItem).filter(FeedItem.id > feed_id)
+        if source_list:
+            feed_query = feed_query.filter(FeedItem.source.in_(source_list))
+        new_feed_items = feed_query.order_by(FeedItem.id).limit(STREAM_BATCH_SIZE).all()
+
+        new_schedule_items = []
+        if not source_list or POTUS_SCHEDULE_SOURCE in source_list:
+            new_schedule_items = (
+                db.query(PresidentSchedule)
+                .filter(PresidentSchedule.id > schedule_id)
+                .order_by(PresidentSchedule.id)
+                .limit(STREAM_BATCH_SIZE)
+                .all()
+            )
+
+        for item in new_feed_items:
+            feed_id = item.id
+            events.append(format_event("feed-item", format_feed_item(item), f"{feed_id}-{schedule_id}"))
+        for item in new_schedule_items:
+            schedule_id = item.id
+            events.append(format_event("feed-item", format_president_schedule_item(item), f"{feed_id}-{schedule_id}"))
+
+
+        current_session_info = session_info_response(db)["data"]
+        if current_session_info != session_info:
+            events.append(format_event("session-info", current_session_info))
+
+    has_more = STREAM_BATCH_SIZE in (len(new_feed_items), len(new_schedule_items))
+    return events, (feed_id, schedule_id), current_session_info, has_more
+
+
+async def event_stream(request, last_event_id, source_list):
+    """
+    Server-Sent Events of rows inserted by the ingest jobs, and of session info
+    whenever it changes. Resumes after last_event_id if given, otherwise starts
+    from the newest rows.
+    """
+    last_ids = parse_event_id(last_event_id)
+    if last_ids is None:
+        last_ids = await run_in_threadpool(latest_ids)
+
+    session_info = None
+    generation = None
+    idle = 0.0
+    while not await request.is_disconnected():
+        latest_generation = await run_in_threadpool(current_generation)
+        if generation != latest_generation:
+            generation = latest_generation
+            events, last_ids, session_info, has_more = await run_in_threadpool(
+                read_new_events, last_ids, source_list, session_info
+            )
+            if has_more:
+                generation = None
+            for event in events:
+                yield event
+            if events:
+                idle = 0.0
+        if idle >= STREAM_KEEPALIVE_INTERVAL:
+            yield ": keep-alive\n\n"
+            idle = 0.0
+        await asyncio.sleep(STREAM_POLL_INTERVAL)
+        idle += STREAM_POLL_INTERVAL
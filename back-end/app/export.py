@@ -0,0 +1,126 @@
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+import csv
+import io
+import orjson
+import os
+import zlib
+
+from app.api import (
+    INVALID_DATE_RANGE,
+    POTUS_SCHEDULE_SOURCE,
+    parse_date_range,
+    tier_streams,
+)
+from app.archive import get_archived_before
+from app.database import ReadSessionLocal
+from app.models import FeedItem, FeedItemArchive, PresidentSchedule, PresidentScheduleArchive
+from app.pagination import merge_streams
+from app.responses import FEED_ITEM_FIELDS, GZIP_LEVEL, JsonFragment, accepted_encodings
+
+# Rows serialized into each chunk written to the response
+EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", 500))
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+INVALID_EXPORT_FORMAT = f"Invalid format. Must be one of: {', '.join(EXPORT_FORMATS)}"
+
+router = APIRouter()
+
+
+@router.get("/export")
+def export_feed(
+    request: Request,
+    sources: str = "",
+    from_date: str = Query("", alias="from"),
+    to_date: str = Query("", alias="to"),
+    export_format: str = Query("ndjson", alias="format"),
+):
+    """
+    Streams every matching feed item and schedule entry, newest first, as NDJSON or
+    CSV, gzip-compressed if the client accepts it. Archived rows are included.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=INVALID_EXPORT_FORMAT)
+    try:
+        date_range = parse_date_range(from_date, to_date)
+    except (ValueError, OverflowError):
+        raise HTTPException(status_code=400, detail=INVALID_DATE_RANGE)
+
+    chunks = export_chunks(sources.split(",") if sources else None, date_range, export_format)
+    headers = {"Content-Disposition": f'attachment; filename="congressrss-export.{export_format}"'}
+    # Compressed incrementally as it streams, which only gzip is set up for here
+    if "gzip" in accepted_encodings(request.headers.get("accept-encoding", "")):
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type=EXPORT_FORMATS[export_format], headers=headers)
+
+
+def export_chunks(source_list, date_range, export_format):
+    """
+    Merges the ordered streams of both tiers, like /feed without a limit, and yields
+    the serialized rows in chunks. Rows are read in small batches as the response
+    is sent, so memory use doesn't grow with the size of the export.
+    """
+    potus_schedule_included = not source_list or POTUS_SCHEDULE_SOURCE in source_list
+    filters = (source_list, potus_schedule_included, date_range, None, None, None)
+    with ReadSessionLocal() as db:
+        streams = tier_streams(db, FeedItem, PresidentSchedule, *filters)
+        archived_before = get_archived_before(db)
+        start, _ = date_range
+        if archived_before is not None and (start is None or start < archived_before):
+            streams += tier_streams(db, FeedItemArchive, PresidentScheduleArchive, *filters)
+
+        serialize = serialize_csv if export_format == "csv" else serialize_ndjson
+        if export_format == "csv":
+            yield csv_header()
+        batch = []
+        for _, item in merge_streams(streams):
+            batch.append(item)
+            if len(batch) == EXPORT_CHUNK_ROWS:
+                yield serialize(batch)
+                batch = []
+        if batch:
+            yield serialize(batch)
+
+
+def serialize_ndjson(items):
+    return b"".join(
+        (item if isinstance(item, JsonFragment) else orjson.dumps(item)) + b"\n" for item in items
+    )
+
+
+def serialize_csv(items):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for item in items:
+        # Stored fragments already hold the API's string forms of the dates
+        if isinstance(item, JsonFragment):
+            item = orjson.loads(bytes(item))
+        writer.writerow([csv_value(item[field]) for field in FEED_ITEM_FIELDS])
+    return buffer.getvalue().encode()
+
+
+def csv_header():
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(FEED_ITEM_FIELDS)
+    return buffer.getvalue().encode()
+
+
+def csv_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def gzip_chunks(chunks):
+    """
+    Gzip-compresses a stream of chunks incrementally.
+    """
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,82 @@
+from datetime import timedelta
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models import DailyCount
+
+POTUS_SCHEDULE_SOURCE = "potus-schedule"
+
+# (table, date column, source expression) for every table whose rows are counted.
+# Archiving moves a row from a hot table to its archive, so its count is unchanged.
+COUNTED_TABLES = [
+    ("feed_items", "pubDate", "{row}.source"),
+    ("feed_items_archive", "pubDate", "{row}.source"),
+    ("president_schedule", "time", f"'{POTUS_SCHEDULE_SOURCE}'"),
+    ("president_schedule_archive", "time", f"'{POTUS_SCHEDULE_SOURCE}'"),
+]
+
+
+def daily_count_triggers():
+    statements = []
+    for table, date_column, source in COUNTED_TABLES:
+        statements.append(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_daily_count_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO daily_counts(day, source, count)
+                VALUES (date(new."{date_column}"), {source.format(row="new")}, 1)
+                ON CONFLICT(day, source) DO UPDATE SET count = count + 1;
+            END
+            """
+        )
+        statements.append(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_daily_count_delete AFTER DELETE ON {table} BEGIN
+                UPDATE daily_counts SET count = count - 1
+                WHERE day = date(old."{date_column}") AND source = {source.format(row="old")};
+            END
+            """
+        )
+    return statements
+
+
+def create_daily_counts(db: Session):
+    """
+    Creates the triggers that keep daily_counts current at ingest, counting the
+    existing rows the first time they're created.
+    """
+    exists = db.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'feed_items_daily_count_insert'")
+    ).first()
+    if not exists:
+        db.execute(text("DELETE FROM daily_counts"))
+        for table, date_column, source in COUNTED_TABLES:
+            db.execute(
+                text(
+                    f"""
+                    INSERT INTO daily_counts(day, source, count)
+                    SELECT date("{date_column}") AS day, {source.format(row=table)} AS row_source, count(*)
+                    FROM {table}
+                    GROUP BY day, row_source
+                    ON CONFLICT(day, source) DO UPDATE SET count = count + excluded.count
+                    """
+                )
+            )
+    for statement in daily_count_triggers():
+        db.execute(text(statement))
+    db.commit()
+
+
+def daily_counts(db: Session, source_list=None, start=None, end=None):
+    """
+    Daily counts, oldest first, optionally for some sources and for the days
+    overlapping [start, end).
+    """
+    query = db.query(DailyCount).filter(DailyCount.count > 0)
+    if source_list:
+        query = query.filter(DailyCount.source.in_(source_list))
+    if start is not None:
+        query = query.filter(DailyCount.day >= start.date())
+    if end is not None:
+        # end is exclusive, so a range ending at midnight doesn't include that day
+        query = query.filter(DailyCount.day <= (end - timedelta(microseconds=1)).date())
+    return query.order_by(DailyCount.day, DailyCount.source).all()
@@ -0,0 +1,204 @@
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+import logging
+import os
+import requests
+import threading
+import time
+
+from app.metrics import HTTP_CIRCUIT_OPEN
+
+# Seconds to wait for a connection, and between bytes of the response
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 5))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 15))
+# Most seconds one request may take in all, retries and reading the body included,
+# so a slow host can't hold a fetch worker past the next poll
+HTTP_TOTAL_TIMEOUT = float(os.environ.get("HTTP_TOTAL_TIMEOUT", 45))
+
+# Retries after a connection error, timeout or 429/5xx response, waiting
+# HTTP_RETRY_BACKOFF * 2^n seconds between them
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", 2))
+HTTP_RETRY_BACKOFF = float(os.environ.get("HTTP_RETRY_BACKOFF", 0.5))
+
+# Hosts with a kept-alive pool, and connections kept per host
+HTTP_POOL_HOSTS = int(os.environ.get("HTTP_POOL_HOSTS", 16))
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", 4))
+
+# A host is skipped for CIRCUIT_RESET_SECONDS after this many failed requests in a row
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", 3))
+CIRCUIT_RESET_SECONDS = int(os.environ.get("CIRCUIT_RESET_SECONDS", 300))
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """
+    Raised instead of sending a request to a host that is known to be down.
+    """
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """
+    Raised when a request runs past HTTP_TOTAL_TIMEOUT.
+    """
+
+
+class CircuitBreaker:
+    """
+    Tracks consecutive failures of one host. Once CIRCUIT_FAILURE_THRESHOLD is
+    reached the circuit opens and requests fail fast; after CIRCUIT_RESET_SECONDS
+    a single trial request is let through, which closes it again if it succeeds.
+    """
+
+    def __init__(self, host: str):
+        self.host = host
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.trial_running or time.monotonic() - self.opened_at < CIRCUIT_RESET_SECONDS:
+                return False
+            self.trial_running = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            if self.opened_at is not None:
+                logging.info(f"Requests to {self.host} are succeeding again")
+                HTTP_CIRCUIT_OPEN.labels(self.host).set(0)
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_running or self.failures >= CIRCUIT_FAILURE_THRESHOLD:
+                if self.opened_at is None:
+                    logging.error(
+                        f"Skipping requests to {self.host} for {CIRCUIT_RESET_SECONDS}s "
+                        f"after {self.failures} failures"
+                    )
+                    HTTP_CIRCUIT_OPEN.labels(self.host).set(1)
+                self.opened_at = time.monotonic()
+                self.trial_running = False
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def circuit_breaker(host: str):
+    with _breakers_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(host)
+        return _breakers[host]
+
+
+def create_session():
+    # Retries are made by get(), which can stop them at the request's deadline
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_SIZE)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Shared by every ingest job, so connections to each host are kept alive between polls
+session = create_session()
+
+
+def get(url, headers=None, timeout=None, stream=False):
+    """
+    GETs a URL through the shared session, unless the host's circuit is open.
+    Raises a RequestException on failure, including for error statuses, and
+    DeadlineExceeded once HTTP_TOTAL_TIMEOUT has passed. With stream, the body is
+    left unread for the caller to consume from response.raw, checking the
+    response's deadline with check_deadline.
+    """
+    breaker = circuit_breaker(urlsplit(url).netloc)
+    if not breaker.allow():
+        raise CircuitOpenError(f"{breaker.host} is unavailable, skipping request")
+    deadline = time.monotonic() + HTTP_TOTAL_TIMEOUT
+    try:
+        response = send(url, headers, timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT), deadline)
+        try:
+            response.raise_for_status()
+            if stream:
+                response.deadline = deadline
+            else:
+                read_body(response, deadline)
+        except requests.exceptions.RequestException:
+            response.close()
+            raise
+    except requests.exceptions.HTTPError as e:
+        # A client error means the request was wrong, not that the host is down
+        if e.response.status_code >= 500 or e.response.status_code == 429:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        raise
+    except requests.exceptions.RequestException:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    return response
+
+
+def send(url, headers, timeout, deadline):
+    """
+    Sends the request, retrying after a connection error, timeout or RETRY_STATUSES
+    response up to HTTP_RETRIES times, waiting HTTP_RETRY_BACKOFF * 2^n seconds
+    between tries. No retry is started that the deadline would cut short, and each
+    try's timeouts are capped at the time left. The body is left unread.
+    """
+    connect_timeout, read_timeout = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    for attempt in range(HTTP_RETRIES + 1):
+        remaining = deadline - time.monotonic()
+        backoff = HTTP_RETRY_BACKOFF * 2 ** attempt
+        try:
+            response = session.get(
+                url,
+                headers=headers,
+                timeout=(min(connect_timeout, remaining), min(read_timeout, remaining)),
+                stream=True,
+            )
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt == HTTP_RETRIES or time.monotonic() + backoff >= deadline:
+                raise
+        else:
+            if (
+                response.status_code not in RETRY_STATUSES
+                or attempt == HTTP_RETRIES
+                or time.monotonic() + backoff >= deadline
+            ):
+                return response
+            response.close()
+        time.sleep(backoff)
+
+
+def read_body(response, deadline):
+    """
+    Reads the whole body into response.content, as requests does without stream,
+    unless the deadline passes first.
+    """
+    chunks = []
+    while True:
+        check_deadline(deadline)
+        # read1 returns whatever has arrived, so a trickling body can't block past the deadline
+        chunk = response.raw.read1(64 * 1024, decode_content=True)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    response._content = b"".join(chunks)
+    response._content_consumed = True
+
+
+def check_deadline(deadline):
+    if time.monotonic() > deadline:
+        raise DeadlineExceeded(f"Request took longer than {HTTP_TOTAL_TIMEOUT}s")
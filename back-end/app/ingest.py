@@ -0,0 +1,124 @@
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+import fcntl
+import logging
+import os
+
+from app.archive import ARCHIVE_INTERVAL_HOURS, archive_old_rows
+from app.crud import upgrade_schema
+from app.database import Base, SessionLocal, engine
+from app.polling import FEED_POLL_TICK
+from app.rss_fetcher import (
+    cluster_pending_items,
+    fetch_and_store_rss,
+    fetch_session_info,
+    fetch_president_schedule,
+)
+from app.snapshots import write_snapshots
+
+# How often items stored without clustering (bulk loads) are clustered
+CLUSTER_INTERVAL_MINUTES = int(os.environ.get("CLUSTER_INTERVAL_MINUTES", 10))
+
+# "embedded": web processes elect one of themselves to run the ingest jobs.
+# "worker": web processes only serve reads and `python -m app.worker` runs ingest.
+EMBEDDED_INGEST = "embedded"
+WORKER_INGEST = "worker"
+INGEST_MODE = os.environ.get("INGEST_MODE", EMBEDDED_INGEST)
+
+# Lock files live next to the database, so every process sharing it sees them
+INGEST_LOCK_FILE = os.environ.get("INGEST_LOCK_FILE", f"{engine.url.database}.ingest-lock")
+MIGRATION_LOCK_FILE = os.environ.get("MIGRATION_LOCK_FILE", f"{engine.url.database}.migration-lock")
+# How often a process that isn't running ingest checks whether the leader went away
+LEADER_RETRY_SECONDS = int(os.environ.get("LEADER_RETRY_SECONDS", 30))
+
+LEADER_RETRY_JOB = "become_ingest_leader"
+
+# Held open for the life of the process once acquired; the OS releases it on exit
+_ingest_lock = None
+
+
+def acquire_ingest_lock(blocking=False):
+    """
+    Tries to become the one process that runs the ingest jobs. Returns whether it did.
+    """
+    global _ingest_lock
+    if _ingest_lock is not None:
+        return True
+    lock_file = open(INGEST_LOCK_FILE, "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return False
+    _ingest_lock = lock_file
+    return True
+
+
+@contextmanager
+def migration_lock():
+    """
+    Serializes schema upgrades between processes starting at the same time.
+    """
+    with open(MIGRATION_LOCK_FILE, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def migrate_database():
+    with migration_lock():
+        Base.metadata.create_all(bind=engine)
+        with SessionLocal() as db:
+            upgrade_schema(db)
+
+
+def refreshing_snapshots(job):
+    """
+    Wraps an ingest job so the static snapshots are rewritten whenever it changes data.
+    """
+    @wraps(job)
+    def run():
+        if job():
+            write_snapshots()
+    return run
+
+
+def add_ingest_jobs(scheduler):
+    # Each job also runs once right away, in the background, to warm up the data.
+    # Requests are served from the persisted database in the meantime.
+    now = datetime.now()
+    # Feeds are polled on their own adaptive intervals; this tick only picks the ones that are due
+    scheduler.add_job(refreshing_snapshots(fetch_and_store_rss), "interval", id="fetch_and_store_rss", seconds=FEED_POLL_TICK, next_run_time=now, misfire_grace_time=60, max_instances=1, coalesce=True)
+    scheduler.add_job(refreshing_snapshots(fetch_session_info), "interval", id="fetch_session_info", minutes=30, next_run_time=now, misfire_grace_time=60, max_instances=3)
+    scheduler.add_job(refreshing_snapshots(fetch_president_schedule), "interval", id="fetch_president_schedule", minutes=30, next_run_time=now, misfire_grace_time=60, max_instances=3)
+    scheduler.add_job(refreshing_snapshots(cluster_pending_items), "interval", id="cluster_pending_items", minutes=CLUSTER_INTERVAL_MINUTES, next_run_time=now, misfire_grace_time=60, max_instances=1, coalesce=True)
+    scheduler.add_job(archive_old_rows, "interval", id="archive_old_rows", hours=ARCHIVE_INTERVAL_HOURS, next_run_time=now, misfire_grace_time=3600, max_instances=1, coalesce=True)
+
+
+def elect_ingest_leader(scheduler):
+    """
+    Adds the ingest jobs to this process's scheduler if it wins the ingest lock.
+    Otherwise keeps retrying, so another process takes over if the leader exits.
+    """
+    if acquire_ingest_lock():
+        logging.info("This process is running the ingest jobs")
+        add_ingest_jobs(scheduler)
+    elif scheduler.get_job(LEADER_RETRY_JOB) is None:
+        scheduler.add_job(
+            retry_ingest_leadership,
+            "interval",
+            id=LEADER_RETRY_JOB,
+            seconds=LEADER_RETRY_SECONDS,
+            args=[scheduler],
+            max_instances=1,
+            coalesce=True,
+        )
+
+
+def retry_ingest_leadership(scheduler):
+    if acquire_ingest_lock():
+        scheduler.remove_job(LEADER_RETRY_JOB)
+        elect_ingest_leader(scheduler)
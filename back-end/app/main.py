@@ -1,16 +1,22 @@
+from anyio import to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.staticfiles import StaticFiles
+from apscheduler.events import EVENT_JOB_SUBMITTED
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from app.database import Base, engine
+from app.database import API_THREADPOOL_SIZE, engine, read_engine
 from app.api import router as api_router
-from app.rss_fetcher import (
-    fetch_and_store_rss,
-    fetch_session_info,
-    fetch_president_schedule,
-)
+from app.events import router as events_router
+from app.export import router as export_router
+from app.ingest import EMBEDDED_INGEST, INGEST_MODE, elect_ingest_leader, migrate_database
+from app.metrics import instrument_engine, record_job_lag, record_request_latency
+from app.metrics import router as metrics_router
+from app.responses import COMPRESSION_MIN_SIZE, GZIP_LEVEL, FastJSONResponse
+from app.snapshots import SNAPSHOT_DIR
 
 
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
 
 # CORS Middleware
 app.add_middleware(
@@ -21,22 +27,44 @@ app.add_middleware(
     allow_headers=["Content-Type", "Accept"],
 )
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Compresses the responses that cached_response hasn't already encoded
+app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE, compresslevel=GZIP_LEVEL)
 
 # Include API router
 app.include_router(api_router)
+app.include_router(events_router)
+app.include_router(export_router)
+app.include_router(metrics_router)
+
+# Precomputed responses written after each ingest; the directory appears after the first one
+if SNAPSHOT_DIR:
+    app.mount("/snapshots", StaticFiles(directory=SNAPSHOT_DIR, check_dir=False), name="snapshots")
+
+# Request latency and SQL timing metrics
+app.middleware("http")(record_request_latency)
+instrument_engine(engine)
+instrument_engine(read_engine)
 
 # Initialize scheduler
 scheduler = AsyncIOScheduler()
+scheduler.add_listener(record_job_lag, EVENT_JOB_SUBMITTED)
+
+
+@app.on_event("startup")
+async def init_database():
+    # Create database tables
+    migrate_database()
+
+
+@app.on_event("startup")
+async def size_threadpool():
+    # The sync routes and their DB queries run here instead of on the event loop
+    to_thread.current_default_thread_limiter().total_tokens = API_THREADPOOL_SIZE
 
-fetch_president_schedule()
-fetch_session_info()
-fetch_and_store_rss()
 
 @app.on_event("startup")
 async def schedule_fetching():
-    scheduler.add_job(fetch_and_store_rss, "interval", minutes=5, misfire_grace_time=60, max_instances=3)
-    scheduler.add_job(fetch_session_info, "interval", minutes=30, misfire_grace_time=60, max_instances=3)
-    scheduler.add_job(fetch_president_schedule, "interval", minutes=30, misfire_grace_time=60, max_instances=3)
-    scheduler.start()
+    # With a separate ingest worker, web processes only serve reads
+    if INGEST_MODE == EMBEDDED_INGEST:
+        elect_ingest_leader(scheduler)
+        scheduler.start()
@@ -0,0 +1,98 @@
+from datetime import datetime, timezone
+from fastapi import APIRouter, Request, Response
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+import logging
+import os
+import time
+
+# Queries slower than this many seconds are logged
+SLOW_QUERY_SECONDS = float(os.environ.get("SLOW_QUERY_SECONDS", 0.5))
+
+router = APIRouter()
+
+FEED_FETCH_SECONDS = Histogram(
+    "feed_fetch_seconds", "Time spent downloading a source", ["source"]
+)
+FEED_BYTES = Counter(
+    "feed_bytes_downloaded_total", "Response bytes downloaded from a source", ["source"]
+)
+FEED_PARSE_SECONDS = Histogram(
+    "feed_parse_seconds", "Time spent parsing a source's response", ["source"]
+)
+FEED_ENTRIES_SEEN = Counter(
+    "feed_entries_seen_total", "Entries parsed from a source", ["source"]
+)
+FEED_ENTRIES_INSERTED = Counter(
+    "feed_entries_inserted_total", "Entries from a source that were new and stored", ["source"]
+)
+FEED_FAILURES = Counter(
+    "feed_failures_total", "Failed fetches of a source", ["source"]
+)
+HTTP_CIRCUIT_OPEN = Gauge(
+    "http_circuit_open", "Whether requests to a host are being skipped after repeated failures", ["host"]
+)
+REQUEST_SECONDS = Histogram(
+    "http_request_seconds", "API request latency", ["method", "route", "status"]
+)
+QUERY_SECONDS = Histogram(
+    "sql_query_seconds", "SQL statement execution time", ["statement"]
+)
+SCHEDULER_LAG_SECONDS = Histogram(
+    "scheduler_lag_seconds",
+    "How late a scheduled job started",
+    ["job"],
+    buckets=(0.01, 0.1, 0.5, 1, 5, 15, 30, 60, 300),
+)
+LLM_SECONDS = Histogram(
+    "llm_request_seconds", "LLM API call latency", buckets=(0.5, 1, 2, 5, 10, 20, 30, 60)
+)
+LLM_CACHE_HITS = Counter("llm_cache_hits_total", "Prompts answered from the LLM cache")
+LLM_CACHE_MISSES = Counter("llm_cache_misses_total", "Prompts sent to the LLM")
+
+
+@router.get("/metrics")
+def metrics():
+    """
+    Prometheus metrics for ingest, API and database activity.
+    """
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+async def record_request_latency(request: Request, call_next):
+    """
+    HTTP middleware timing each request, labelled by route template rather than URL.
+    """
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    REQUEST_SECONDS.labels(
+        request.method, route.path if route else "unmatched", response.status_code
+    ).observe(time.perf_counter() - start)
+    return response
+
+
+def instrument_engine(engine):
+    """
+    Times every SQL statement through SQLAlchemy's cursor hooks and logs slow ones.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_times", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_times"].pop()
+        QUERY_SECONDS.labels(statement.lstrip().split(" ", 1)[0].upper()).observe(elapsed)
+        if elapsed >= SLOW_QUERY_SECONDS:
+            logging.warning(f"Slow query ({elapsed:.3f}s): {statement}")
+
+
+def record_job_lag(event):
+    """
+    APScheduler EVENT_JOB_SUBMITTED listener recording how late each job started.
+    """
+    scheduled_at = event.scheduled_run_times[-1]
+    lag = (datetime.now(timezone.utc) - scheduled_at).total_seconds()
+    SCHEDULER_LAG_SECONDS.labels(event.job_id).observe(max(lag, 0))
@@ -1,5 +1,5 @@
 from app.database import Base
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Date, Integer, String, DateTime, Index, LargeBinary
 from app.utils import current_time
 
 
@@ -19,6 +19,21 @@ class FeedItem(Base, TimestampMixin):
     link = Column(String)
     pubDate = Column(DateTime(timezone=True), index=True)
     source = Column(String)
+    # Hash of link + pubDate + title, used to skip items we already have on insert
+    item_hash = Column(String, unique=True, index=True)
+    # The item serialized as the API returns it, stored at ingest (see STORE_JSON_FRAGMENTS)
+    json_fragment = Column(LargeBinary)
+    # Id of the first item seen with a near-identical title; its own id if none (see app/dedup.py)
+    cluster_id = Column(Integer)
+
+    __table_args__ = (
+        # Serves sources= queries as one index seek per source, already in feed order
+        Index("ix_feed_items_source_pub_date", source, pubDate.desc(), id.desc()),
+        # Items stored without clustering, for the job that clusters them later
+        Index("ix_feed_items_unclustered", id, sqlite_where=cluster_id.is_(None)),
+        # Ids of rows moved to the archive are never handed out again (see enable_autoincrement)
+        {"sqlite_autoincrement": True},
+    )
 
 
 class SessionInfo(Base, TimestampMixin):
@@ -38,3 +53,98 @@ class PresidentSchedule(Base, TimestampMixin):
     time = Column(DateTime(timezone=True), index=True)
     description = Column(String, index=True)
     press_information = Column(String)
+
+    __table_args__ = (
+        Index("ix_president_schedule_natural_key", "time", "location", "description", unique=True),
+        {"sqlite_autoincrement": True},
+    )
+
+
+# Rows older than ARCHIVE_AFTER_DAYS are moved to these tables, keeping their ids, so
+# the hot tables and their indexes only hold recent data. They only need the indexes
+# used to page through them.
+class FeedItemArchive(Base, TimestampMixin):
+    __tablename__ = "feed_items_archive"
+    id = Column(Integer, primary_key=True)
+    title = Column(String)
+    link = Column(String)
+    pubDate = Column(DateTime(timezone=True), index=True)
+    source = Column(String)
+    # Checked alongside the hot table's when items are stored straight into the archive
+    item_hash = Column(String, index=True)
+    json_fragment = Column(LargeBinary)
+    cluster_id = Column(Integer)
+
+    __table_args__ = (
+        Index("ix_feed_items_archive_source_pub_date", source, pubDate.desc(), id.desc()),
+    )
+
+
+class PresidentScheduleArchive(Base, TimestampMixin):
+    __tablename__ = "president_schedule_archive"
+    id = Column(Integer, primary_key=True)
+    link = Column(String)
+    location = Column(String)
+    time = Column(DateTime(timezone=True), index=True)
+    description = Column(String)
+    press_information = Column(String)
+
+
+# Items per UTC day and source across both tiers, kept current by triggers (see
+# app/histogram.py)
+class DailyCount(Base):
+    __tablename__ = "daily_counts"
+    day = Column(Date, primary_key=True)
+    source = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+# MinHash signatures of recent feed item titles and their LSH band buckets, used to
+# find near-duplicates at ingest (see app/dedup.py). Pruned as items are archived.
+class MinHashSignature(Base):
+    __tablename__ = "minhash_signatures"
+    feed_item_id = Column(Integer, primary_key=True)
+    pubDate = Column(DateTime(timezone=True), index=True)
+    signature = Column(LargeBinary, nullable=False)
+
+
+class LshBucket(Base):
+    __tablename__ = "lsh_buckets"
+    # Hash of one band of a signature, and of the band's number
+    bucket = Column(Integer, primary_key=True)
+    feed_item_id = Column(Integer, primary_key=True, index=True)
+    # The item's pubDate, so a lookup only reads the bucket's entries within the window
+    pubDate = Column(DateTime(timezone=True))
+
+    __table_args__ = (Index("ix_lsh_buckets_bucket_pub_date", bucket, pubDate, feed_item_id),)
+
+
+class HttpCache(Base, TimestampMixin):
+    __tablename__ = "http_cache"
+    url = Column(String, primary_key=True)
+    etag = Column(String)
+    last_modified = Column(String)
+    content_hash = Column(String)
+
+
+class SyncState(Base, TimestampMixin):
+    __tablename__ = "sync_state"
+    key = Column(String, primary_key=True)
+    value = Column(String)
+
+
+class LlmCache(Base, TimestampMixin):
+    __tablename__ = "llm_cache"
+    prompt_hash = Column(String, primary_key=True)
+    model = Column(String)
+    response = Column(String)
+
+
+class SourceSchedule(Base, TimestampMixin):
+    __tablename__ = "source_schedule"
+    source = Column(String, primary_key=True)
+    interval_seconds = Column(Integer)
+    next_run = Column(DateTime)
+    last_attempt = Column(DateTime)
+    last_success = Column(DateTime)
+    failure_count = Column(Integer, default=0)
@@ -0,0 +1,76 @@
+from sqlalchemy import desc, tuple_
+from datetime import datetime
+import base64
+import heapq
+import json
+
+# Rows are pulled from each ordered stream in batches of this size as the merge consumes them
+STREAM_BATCH_SIZE = 50
+
+
+def encode_cursor(pub_date: datetime, source: str, item_id: int):
+    """
+    Builds an opaque cursor from the (pubDate, source, id) sort key of the last item on a page.
+    """
+    key = json.dumps([pub_date.isoformat(), source, item_id])
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """
+    Returns the (pubDate, source, id) sort key in a cursor. Raises ValueError if it's malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        pub_date, source, item_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(pub_date), str(source), int(item_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def seek(query, date_column, source_column, id_column, cursor=None):
+    """
+    Orders a query by (date, source, id) descending and, given a cursor, seeks past it.
+    """
+    if cursor is not None:
+        pub_date, source, item_id = cursor
+        query = query.filter(
+            # The plain date bound lets SQLite range-scan the date index
+            date_column <= pub_date,
+            tuple_(date_column, source_column, id_column) < (pub_date, source, item_id),
+        )
+    return query.order_by(desc(date_column), desc(source_column), desc(id_column))
+
+
+def seek_source(query, date_column, id_column, source, cursor=None):
+    """
+    Like seek(), for a query whose rows all belong to one source, so ordering and
+    seeking only involve (date, id).
+    """
+    if cursor is not None:
+        pub_date, cursor_source, item_id = cursor
+        if source < cursor_source:
+            query = query.filter(date_column <= pub_date)
+        elif source == cursor_source:
+            query = query.filter(
+                date_column <= pub_date,
+                tuple_(date_column, id_column) < (pub_date, item_id),
+            )
+        else:
+            query = query.filter(date_column < pub_date)
+    return query.order_by(desc(date_column), desc(id_column))
+
+
+def stream(query, sort_key, format_item):
+    """
+    Lazily yields (sort_key, formatted item) pairs from an ordered query.
+    """
+    for item in query.yield_per(STREAM_BATCH_SIZE):
+        yield sort_key(item), format_item(item)
+
+
+def merge_streams(streams):
+    """
+    Lazily merges streams that are each ordered by descending sort key.
+    """
+    return heapq.merge(*streams, key=lambda entry: entry[0], reverse=True)
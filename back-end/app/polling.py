@@ -0,0 +1,64 @@
+from datetime import timedelta
+import os
+import random
+
+# How often the scheduler checks which feeds are due, in seconds
+FEED_POLL_TICK = int(os.environ.get("FEED_POLL_TICK", 60))
+
+# Bounds on how often a single feed is polled, in seconds
+MIN_POLL_INTERVAL = int(os.environ.get("MIN_POLL_INTERVAL", 2 * 60))
+MAX_POLL_INTERVAL = int(os.environ.get("MAX_POLL_INTERVAL", 60 * 60))
+DEFAULT_POLL_INTERVAL = int(os.environ.get("DEFAULT_POLL_INTERVAL", 5 * 60))
+MAX_FAILURE_BACKOFF = int(os.environ.get("MAX_FAILURE_BACKOFF", 6 * 60 * 60))
+
+# How many polls to aim for between two posts of a source
+POLLS_PER_POST = 4
+# How many of a feed's newest entries are used to estimate its publish rate
+PUBLISH_RATE_WINDOW = 10
+# Each delay is randomly stretched or shrunk by up to this fraction
+POLL_JITTER = 0.1
+# How much longer to wait after a poll that found nothing new
+UNCHANGED_BACKOFF = 1.25
+
+
+# When each feed polled by this process is next due. A poll that changes nothing
+# about a feed's schedule only updates this; a newly started process polls each
+# feed at its stored next_run.
+_next_runs = {}
+
+
+def is_due(source, schedule, now):
+    next_run = _next_runs.get(source, schedule.next_run if schedule else None)
+    return next_run is None or next_run <= now
+
+
+def set_next_run(source, next_run):
+    _next_runs[source] = next_run
+
+
+def adapt_interval(interval, pub_dates, now):
+    """
+    Picks a polling interval from a feed's observed publish rate: the newest entries
+    and the silence since the newest one. Without enough entries, the interval
+    just grows a little.
+    """
+    newest = sorted(pub_dates, reverse=True)[:PUBLISH_RATE_WINDOW]
+    if len(newest) < 2:
+        return clamp_interval(interval * UNCHANGED_BACKOFF)
+    average_gap = (now - newest[-1]).total_seconds() / len(newest)
+    return clamp_interval(average_gap / POLLS_PER_POST)
+
+
+def clamp_interval(interval):
+    return int(min(MAX_POLL_INTERVAL, max(MIN_POLL_INTERVAL, interval)))
+
+
+def failure_backoff(interval, failure_count):
+    """
+    Exponential backoff after consecutive failures.
+    """
+    return min(MAX_FAILURE_BACKOFF, interval * 2 ** failure_count)
+
+
+def next_run_after(now, delay):
+    return now + timedelta(seconds=delay * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER))
@@ -0,0 +1,149 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from fastapi.responses import JSONResponse
+from xml.sax.saxutils import escape
+import gzip
+import orjson
+import os
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Responses smaller than this many bytes aren't worth compressing
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 500))
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY", 5))
+
+# Whether ingest stores each feed item's serialized JSON, so /feed pages can be
+# assembled from stored bytes instead of re-encoding every row
+STORE_JSON_FRAGMENTS = int(os.environ.get("STORE_JSON_FRAGMENTS", 1))
+
+# Fields of a feed item as returned by the API, in order
+FEED_ITEM_FIELDS = ("title", "link", "pubDate", "source", "updated_at")
+
+# Channel details of the RSS rendering of the feed
+RSS_CHANNEL_TITLE = "Congress RSS"
+RSS_CHANNEL_LINK = os.environ.get("RSS_CHANNEL_LINK", "https://congress.cipherkeeper.dev")
+RSS_CHANNEL_DESCRIPTION = "Legislative and executive branch updates, newest first"
+
+
+class JsonFragment(bytes):
+    """
+    Already-serialized JSON, embedded as-is when a response's data is a list of them.
+    """
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson.
+    """
+
+    def render(self, content) -> bytes:
+        return render_json(content)
+
+
+def render_json(content):
+    """
+    Serializes a response with orjson. JsonFragments in a data list are joined in
+    byte-for-byte rather than encoded again.
+    """
+    data = content.get("data") if isinstance(content, dict) else None
+    if not isinstance(data, list) or not any(isinstance(item, JsonFragment) for item in data):
+        return orjson.dumps(content)
+    items = b",".join(
+        item if isinstance(item, JsonFragment) else orjson.dumps(item) for item in data
+    )
+    fields = []
+    for key, value in content.items():
+        encoded = b"[" + items + b"]" if key == "data" else orjson.dumps(value)
+        fields.append(orjson.dumps(key) + b":" + encoded)
+    return b"{" + b",".join(fields) + b"}"
+
+
+def render_rss(content):
+    """
+    Renders a /feed response as an RSS 2.0 document. An error response renders as
+    an empty channel.
+    """
+    items = []
+    for item in (content.get("data") or []) if content.get("status") == "success" else []:
+        # Stored fragments already hold the API's string forms of the dates
+        if isinstance(item, JsonFragment):
+            item = orjson.loads(bytes(item))
+        items.append(rss_item(item))
+    channel = [
+        f"<title>{escape(RSS_CHANNEL_TITLE)}</title>",
+        f"<link>{escape(RSS_CHANNEL_LINK)}</link>",
+        f"<description>{escape(RSS_CHANNEL_DESCRIPTION)}</description>",
+    ]
+    document = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<rss version="2.0"><channel>' + "".join(channel + items) + "</channel></rss>\n"
+    )
+    return document.encode()
+
+
+def rss_item(item: dict):
+    elements = [f"<title>{escape(item['title'] or '')}</title>"]
+    if item["link"]:
+        elements.append(f"<link>{escape(item['link'])}</link>")
+        elements.append(f'<guid isPermaLink="true">{escape(item["link"])}</guid>')
+    elements.append(f"<category>{escape(item['source'])}</category>")
+    elements.append(f"<pubDate>{rss_date(item['pubDate'])}</pubDate>")
+    return "<item>" + "".join(elements) + "</item>"
+
+
+def rss_date(value):
+    """
+    Formats a naive UTC datetime (or its ISO string) as an RFC 822 date.
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return format_datetime(value.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def feed_item_fragment(row: dict):
+    """
+    Serializes a feed item exactly as the API would after reading it back, which
+    means timestamps as naive UTC.
+    """
+    item = {}
+    for field in FEED_ITEM_FIELDS:
+        value = row[field]
+        if isinstance(value, datetime) and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        item[field] = value
+    return orjson.dumps(item)
+
+
+def negotiate_encoding(accept_encoding: str):
+    """
+    Picks brotli (if installed) or gzip from an Accept-Encoding header, or None.
+    """
+    accepted = accepted_encodings(accept_encoding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def accepted_encodings(accept_encoding: str):
+    accepted = set()
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        try:
+            quality = float(params.strip()[2:]) if params.strip().startswith("q=") else 1
+        except ValueError:
+            quality = 1
+        if quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def compress(body: bytes, encoding: str):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
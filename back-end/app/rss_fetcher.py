@@ -1,20 +1,51 @@
 import re
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone, timedelta
-import feedparser
+import ijson
 from sqlalchemy import desc
 from sqlalchemy.orm import Session
+import json
 import logging
+import os
 import pytz
 
+from app.archive import get_archived_before
+from app.cache import bump_generation
 from app.contact_llm import send_prompt
+from app.dedup import DEDUP_BATCH_SIZE, cluster_unclustered_items
+from app.feed_parser import parse_feed
+from app.metrics import (
+    FEED_BYTES,
+    FEED_ENTRIES_INSERTED,
+    FEED_ENTRIES_SEEN,
+    FEED_FAILURES,
+    FEED_FETCH_SECONDS,
+    FEED_PARSE_SECONDS,
+)
 from app.models import FeedItem, SessionInfo, PresidentSchedule
 from app.crud import (
-    get_db,
+    get_read_db,
     update_meeting_info,
     add_feed_item,
-    update_president_schedule,
+    sync_president_schedule,
+    get_sync_state,
+    set_sync_state,
+    get_http_validators,
+    update_http_validators,
+    get_source_schedules,
+    update_source_schedule,
+)
+from app.polling import (
+    DEFAULT_POLL_INTERVAL,
+    adapt_interval,
+    failure_backoff,
+    is_due,
+    next_run_after,
+    set_next_run,
 )
-from app.utils import RSS_FEEDS, fetch
+from app.writer import run_write
+from app.utils import RSS_FEEDS, FEED_FETCH_CONCURRENCY, HashingReader, fetch, is_not_modified
 
 # Constants for file paths
 SENATE_PROMPT_FILE = "app/prompts/senate_prompt.txt"
@@ -22,24 +53,193 @@ HOUSE_PROMPT_FILE = "app/prompts/house_prompt.txt"
 
 SENATE_SOURCE = "senateppg-twitter"
 HOUSE_SOURCE = "housedailypress-twitter"
+POTUS_SCHEDULE_SOURCE = "potus-schedule"
+
+HOUSE_IN_SESSION_URL = "https://in-session.house.gov/"
+PRESIDENT_SCHEDULE_URL = "https://media-cdn.factba.se/rss/json/calendar-full.json"
+SENATE_FLOOR_SCHEDULE_URL = "https://www.senate.gov/legislative/schedule/floor_schedule.json"
+
+# Ingest jobs, as reported by /readyz
+RSS_JOB = "rss"
+PRESIDENT_SCHEDULE_JOB = "president-schedule"
+SESSION_INFO_JOB = "session-info"
+INGEST_JOBS = [RSS_JOB, PRESIDENT_SCHEDULE_JOB, SESSION_INFO_JOB]
+# Each job's last success is recorded to within this many seconds
+LAST_SUCCESS_RESOLUTION = int(os.environ.get("LAST_SUCCESS_RESOLUTION", 10 * 60))
+
+# Schedule entries older than this many days are only re-checked if the whole calendar is resynced
+PRESIDENT_SCHEDULE_HWM_KEY = "president-schedule-synced-through"
+PRESIDENT_SCHEDULE_LOOKBACK_DAYS = int(os.environ.get("PRESIDENT_SCHEDULE_LOOKBACK_DAYS", 14))
+
+FetchedFeed = namedtuple(
+    "FetchedFeed", ["rss_url", "source", "response", "entries", "pub_dates", "mark"]
+)
 
 
 def fetch_and_store_rss():
     """
-    Fetches RSS feed data and stores it in the database.
+    Fetches every RSS feed that is due for a poll concurrently and stores the results
+    in a single write batch, then schedules each feed's next poll. Feeds that haven't
+    changed since the last poll are skipped entirely. Returns the number of items
+    inserted.
     """
-    db = next(get_db())
-    for rss_url, source in RSS_FEEDS:
-        try:
-            parsed_data = feedparser.parse(rss_url)
-            formatted_entries = format_entries(parsed_data.entries, source)
-            add_feed_item(db, formatted_entries)
-            db.commit()
-        except Exception as e:
-            logging.error(f"An error occurred in fetching RSS data from {rss_url}: {e}")
-            db.rollback()
-        finally:
-            db.close()
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    db = next(get_read_db())
+    try:
+        schedules = get_source_schedules(db)
+        due_feeds = [
+            (rss_url, source)
+            for rss_url, source in RSS_FEEDS
+            if is_due(source, schedules.get(source), now)
+        ]
+        validators = get_http_validators(db, [rss_url for rss_url, _ in due_feeds])
+        marks = get_feed_marks(db, [source for _, source in due_feeds])
+    finally:
+        db.close()
+    if not due_feeds:
+        return 0
+
+    fetched_feeds = fetch_all_feeds(due_feeds, validators, marks)
+    try:
+        return run_write(store_fetched_feeds, fetched_feeds, schedules, marks, now)
+    except Exception as e:
+        logging.error(f"An error occurred in storing RSS data: {e}")
+        return 0
+
+
+def store_fetched_feeds(db, fetched_feeds, schedules, marks, now):
+    """
+    Writer batch for fetch_and_store_rss. Returns the number of items inserted.
+    """
+    inserted = 0
+    archived_before = get_archived_before(db)
+    for feed in fetched_feeds:
+        source = feed.source
+        if feed.response is None:
+            schedule_failed_poll(db, schedules.get(source), source, now)
+            continue
+        if feed.entries is not None:
+            formatted_entries = format_entries(feed.entries, source)
+            # Items old enough to be archived are stored in the archive
+            inserted_entries = add_feed_item(db, formatted_entries, archived_before)
+            inserted += inserted_entries
+            FEED_ENTRIES_SEEN.labels(source).inc(len(formatted_entries))
+            FEED_ENTRIES_INSERTED.labels(source).inc(inserted_entries)
+            update_http_validators(db, feed.rss_url, feed.response)
+            if feed.mark != marks.get(source):
+                set_feed_mark(db, source, feed.mark)
+        schedule_next_poll(db, schedules.get(source), source, feed.pub_dates, now)
+    record_success(db, RSS_JOB)
+    if inserted:
+        bump_generation(db)
+    return inserted
+
+
+def schedule_next_poll(db, schedule, source, pub_dates, now):
+    """
+    After a successful poll, adapts the feed's interval to its publish rate. The
+    schedule is only written if the interval changed or the feed had been failing;
+    otherwise the next run is just kept in memory.
+    """
+    interval = schedule.interval_seconds if schedule else DEFAULT_POLL_INTERVAL
+    interval = adapt_interval(interval, pub_dates, now)
+    next_run = next_run_after(now, interval)
+    set_next_run(source, next_run)
+    if schedule is None or schedule.interval_seconds != interval or schedule.failure_count:
+        update_source_schedule(
+            db,
+            source,
+            interval_seconds=interval,
+            failure_count=0,
+            last_attempt=now,
+            last_success=now,
+            next_run=next_run,
+        )
+
+
+def schedule_failed_poll(db, schedule, source, now):
+    """
+    After a failed poll, backs off exponentially without forgetting the feed's interval.
+    """
+    interval = schedule.interval_seconds if schedule else DEFAULT_POLL_INTERVAL
+    failure_count = (schedule.failure_count if schedule else 0) + 1
+    next_run = next_run_after(now, failure_backoff(interval, failure_count))
+    set_next_run(source, next_run)
+    update_source_schedule(
+        db,
+        source,
+        interval_seconds=interval,
+        failure_count=failure_count,
+        last_attempt=now,
+        next_run=next_run,
+    )
+
+
+def fetch_all_feeds(feeds, validators, marks):
+    """
+    Downloads and parses the given (url, source) feeds in parallel, bounded by
+    FEED_FETCH_CONCURRENCY. Returns a FetchedFeed for each: response is None if the
+    fetch failed or timed out, and entries is None if the feed is unchanged.
+    """
+    fetched_feeds = []
+    with ThreadPoolExecutor(max_workers=FEED_FETCH_CONCURRENCY) as executor:
+        futures = {
+            executor.submit(
+                fetch_feed, rss_url, source, validators.get(rss_url), marks.get(source)
+            ): (rss_url, source)
+            for rss_url, source in feeds
+        }
+        for future in as_completed(futures):
+            rss_url, source = futures[future]
+            try:
+                fetched_feeds.append(future.result())
+            except Exception as e:
+                logging.error(f"An error occurred in fetching RSS data from {rss_url}: {e}")
+                FEED_FAILURES.labels(source).inc()
+                fetched_feeds.append(FetchedFeed(rss_url, source, None, None, [], None))
+    return fetched_feeds
+
+
+def fetch_feed(rss_url, source, validators=None, mark=None):
+    """
+    Conditionally downloads a single feed and parses the entries newer than its
+    high-water mark. The response is None if the feed couldn't be fetched, and the
+    entries are None if it hasn't changed.
+    """
+    with FEED_FETCH_SECONDS.labels(source).time():
+        response = fetch(rss_url, validators=validators)
+    if not response:
+        FEED_FAILURES.labels(source).inc()
+        return FetchedFeed(rss_url, source, None, None, [], mark)
+    FEED_BYTES.labels(source).inc(len(response.content))
+    if is_not_modified(response, validators):
+        return FetchedFeed(rss_url, source, response, None, [], mark)
+    with FEED_PARSE_SECONDS.labels(source).time():
+        entries, pub_dates, new_mark = parse_feed(response.content, mark)
+    return FetchedFeed(rss_url, source, response, entries, pub_dates, new_mark)
+
+
+def get_feed_marks(db, sources):
+    """
+    Returns each feed's high-water mark, the (pubDate, link) of the newest entry seen.
+    """
+    marks = {}
+    for source in sources:
+        value = get_sync_state(db, feed_mark_key(source))
+        if value:
+            pub_date, link = json.loads(value)
+            marks[source] = (datetime.fromisoformat(pub_date), link)
+    return marks
+
+
+def set_feed_mark(db, source, mark):
+    pub_date, link = mark
+    set_sync_state(db, feed_mark_key(source), json.dumps([pub_date.isoformat(), link]))
+
+
+def feed_mark_key(source):
+    return f"feed-hwm:{source}"
+
 
 def format_entries(parsed_data, source):
     """
@@ -81,80 +281,154 @@ def handle_twitter_urls(entry):
 
 
 def fetch_president_schedule():
-    db = next(get_db())
-    #db.query(PresidentSchedule).delete()
-    #db.commit()
-    response = fetch("https://media-cdn.factba.se/rss/json/calendar-full.json")
-    if not response:
-        return
+    """
+    Incrementally syncs the President's schedule. Entries dated before the stored
+    high-water mark are settled history and are skipped without being parsed.
+    Returns the number of rows written.
+    """
+    db = next(get_read_db())
     try:
-        items = response.json()
-        for item in items:
-            # Use the 'date' field with 12:00 AM if 'time' is missing or null
-            time_str = item.get("time") if item.get("time") is not None else "00:00:00"
+        validators = get_http_validators(db, [PRESIDENT_SCHEDULE_URL]).get(PRESIDENT_SCHEDULE_URL)
+        synced_through = get_sync_state(db, PRESIDENT_SCHEDULE_HWM_KEY)
+    finally:
+        db.close()
 
-            date_time_str = f"{item['date']} {time_str}"
-            try:
-                date_time_obj = datetime.strptime(date_time_str, "%Y-%m-%d %H:%M:%S")
-                year, month, day, hour, minute = (
-                    date_time_obj.year,
-                    date_time_obj.month,
-                    date_time_obj.day,
-                    date_time_obj.hour,
-                    date_time_obj.minute,
-                )
-                utc_time_obj = convert_to_utc(
-                    year, month, day, hour, minute, timezone="US/Eastern"
-                )
-            except ValueError as ve:
-                logging.error(f"Date parsing error for item {item}: {ve}")
-                continue
+    # The calendar is large, so its body is parsed as it downloads rather than buffered
+    with FEED_FETCH_SECONDS.labels(POTUS_SCHEDULE_SOURCE).time():
+        response = fetch(PRESIDENT_SCHEDULE_URL, validators=validators, stream=True)
+    if not response:
+        FEED_FAILURES.labels(POTUS_SCHEDULE_SOURCE).inc()
+        return 0
 
-            parsed_item = {
-                "link": item.get("url", None),
-                "location": item.get("location", ""),
-                "time": utc_time_obj,
-                "description": item.get("details", ""),
-                "press_information": item.get("coverage", ""),
-            }
-            update_president_schedule(db, parsed_item)
-        db.commit()
+    try:
+        parsed_items = None
+        body_hash = None
+        if response.status_code != 304:
+            body = HashingReader(response.raw, response.deadline)
+            # Only the entries since the high-water mark are kept, up front, so the
+            # write batch only holds the lock for the diff
+            with FEED_PARSE_SECONDS.labels(POTUS_SCHEDULE_SOURCE).time():
+                parsed_items = list(parse_president_schedule(body, synced_through))
+            body_hash = body.hexdigest()
+            FEED_BYTES.labels(POTUS_SCHEDULE_SOURCE).inc(body.size)
+            if validators and validators.get("content_hash") == body_hash:
+                parsed_items = None
+        return run_write(store_president_schedule, parsed_items, synced_through, response, body_hash)
     except Exception as e:
         logging.error(
             f"An error occurred in fetching and updating the President's schedule: {e}"
         )
-        db.rollback()
+        return 0
     finally:
-        db.close()
+        response.close()
+
+
+def store_president_schedule(db, parsed_items, synced_through, response, body_hash=None):
+    """
+    Writer batch for fetch_president_schedule. parsed_items is None if the calendar
+    is unchanged. Returns the number of rows written.
+    """
+    written = 0
+    if parsed_items is not None:
+        since = datetime.fromisoformat(synced_through) if synced_through else None
+        written = sync_president_schedule(db, parsed_items, since, get_archived_before(db))
+        FEED_ENTRIES_INSERTED.labels(POTUS_SCHEDULE_SOURCE).inc(written)
+
+        # Anything older than the lookback window is treated as settled from now on
+        synced_through = datetime.now(timezone.utc).date() - timedelta(
+            days=PRESIDENT_SCHEDULE_LOOKBACK_DAYS
+        )
+        set_sync_state(db, PRESIDENT_SCHEDULE_HWM_KEY, synced_through.isoformat())
+        update_http_validators(db, PRESIDENT_SCHEDULE_URL, response, body_hash)
+    record_success(db, PRESIDENT_SCHEDULE_JOB)
+    if written:
+        bump_generation(db)
+    return written
+
+
+def parse_president_schedule(body, synced_through=None):
+    """
+    Stream-parses the factba.se calendar from a file-like body, yielding entries
+    dated on or after synced_through ('YYYY-MM-DD') without materializing the whole
+    document.
+    """
+    for item in ijson.items(body, "item"):
+        # ISO dates compare correctly as strings, so old entries are skipped cheaply
+        if synced_through and (item.get("date") or "") < synced_through:
+            continue
+
+        # Use the 'date' field with 12:00 AM if 'time' is missing or null
+        time_str = item.get("time") if item.get("time") is not None else "00:00:00"
+
+        date_time_str = f"{item['date']} {time_str}"
+        try:
+            date_time_obj = datetime.strptime(date_time_str, "%Y-%m-%d %H:%M:%S")
+            utc_time_obj = convert_to_utc(
+                date_time_obj.year,
+                date_time_obj.month,
+                date_time_obj.day,
+                date_time_obj.hour,
+                date_time_obj.minute,
+                timezone="US/Eastern",
+            )
+        except ValueError as ve:
+            logging.error(f"Date parsing error for item {item}: {ve}")
+            continue
+
+        yield {
+            "link": item.get("url", None),
+            "location": item.get("location") or "",
+            "time": utc_time_obj,
+            "description": item.get("details") or "",
+            "press_information": item.get("coverage", ""),
+        }
 
 
 def fetch_session_info():
     """
     Fetches session information from the database and sends a prompt to the LLM.
+    Returns whether anything was updated.
     """
-    db = next(get_db())
+    db = next(get_read_db())
+    try:
+        house_info = get_house_floor_info(db)
+        senate_info, senate_response = get_senate_floor_info(db)
+    finally:
+        db.close()
 
-    house_info = get_house_floor_info(db)
+    try:
+        return run_write(store_session_info, house_info, senate_info, senate_response)
+    except Exception as e:
+        logging.error(f"Couldn't update session information into the db: {e}")
+        return False
+
+
+def store_session_info(db, house_info, senate_info, senate_response):
+    """
+    Writer batch for fetch_session_info. Returns whether either chamber's
+    information changed.
+    """
+    updated = False
     if house_info is not None:
         in_session, next_meeting, live_link = house_info
-        update_meeting_info(db, "house", in_session, next_meeting, live_link)
+        updated |= update_meeting_info(db, "house", in_session, next_meeting, live_link)
 
-    senate_info = get_senate_floor_info()
     if senate_info is not None:
         in_session, next_meeting, live_link = senate_info
-        update_meeting_info(db, "senate", in_session, next_meeting, live_link)
-    
-    try:
-        db.commit()
-    except Exception as e:
-        logging.error(f"Couldn't update session information into the db: {e}")
-        db.rollback()
-    finally:
-        db.close()
+        updated |= update_meeting_info(db, "senate", in_session, next_meeting, live_link)
+    if senate_response is not None:
+        update_http_validators(db, SENATE_FLOOR_SCHEDULE_URL, senate_response)
+
+    if house_info is not None and senate_info is not None:
+        record_success(db, SESSION_INFO_JOB)
+    # Unchanged information leaves cached responses and open streams alone
+    if updated:
+        bump_generation(db)
+    return updated
 
 
 def get_house_floor_info(db):
-    response = fetch("https://in-session.house.gov/")
+    response = fetch(HOUSE_IN_SESSION_URL)
     if not response:
         return
 
@@ -177,8 +451,7 @@ def get_house_floor_info(db):
         prompt_template = get_prompt_template(HOUSE_SOURCE)
         prompt = prompt_template.format(current_date=current_date) + "\n\n" + items_str
 
-        next_meeting_date_str = send_prompt(prompt)
-        next_meeting_date = datetime.fromisoformat(next_meeting_date_str)
+        next_meeting_date = send_prompt(prompt, parse=datetime.fromisoformat)
 
         next_meeting_date_utc = convert_to_utc(
             next_meeting_date.year, 
@@ -195,15 +468,29 @@ def get_house_floor_info(db):
         return None
 
 
-def get_senate_floor_info():
-    response = fetch("https://www.senate.gov/legislative/schedule/floor_schedule.json")
+def get_senate_floor_info(db):
+    """
+    Returns the Senate's (in_session, next meeting, live link), or None, along with
+    the response whose validators should be stored, or None if there's nothing new.
+    """
+    validators = get_http_validators(db, [SENATE_FLOOR_SCHEDULE_URL]).get(SENATE_FLOOR_SCHEDULE_URL)
+    response = fetch(SENATE_FLOOR_SCHEDULE_URL, validators=validators)
     if not response:
-        return
+        return None, None
+
+    current_date_time_utc = datetime.now(timezone.utc)
+    if is_not_modified(response, validators):
+        # The schedule is unchanged, so only the in-session flag needs recomputing
+        senate = db.query(SessionInfo).filter_by(chamber="senate").first()
+        if senate is None or senate.meeting_date is None:
+            return None, None
+        convene_date_time_utc = senate.meeting_date.replace(tzinfo=timezone.utc)
+        in_session = int(current_date_time_utc >= convene_date_time_utc)
+        return (in_session, convene_date_time_utc, senate.live_link), None
 
     try:
         data = response.json()
         proceedings = data.get("floorProceedings", [])
-        current_date_time_utc = datetime.now(timezone.utc)
 
         for item in proceedings:
             convene_date_time_utc = convert_to_utc(
@@ -216,10 +503,27 @@ def get_senate_floor_info():
 
             in_session = int(current_date_time_utc >= convene_date_time_utc)
             live_link = item["convenedSessionStream"]
-
-            return in_session, convene_date_time_utc, live_link
+            return (in_session, convene_date_time_utc, live_link), response
     except ValueError as e:
         logging.error(f"Error parsing JSON for Senate's floor schedule: {e}")
+    return None, None
+
+
+def record_success(db, job: str):
+    """
+    Records when an ingest job last completed, for freshness reporting, to within
+    LAST_SUCCESS_RESOLUTION so runs that change nothing don't write.
+    """
+    now = datetime.now(timezone.utc)
+    last_success = get_sync_state(db, last_success_key(job))
+    if last_success is None or now - datetime.fromisoformat(last_success) >= timedelta(
+        seconds=LAST_SUCCESS_RESOLUTION
+    ):
+        set_sync_state(db, last_success_key(job), now.isoformat())
+
+
+def last_success_key(job: str):
+    return f"last-success:{job}"
 
 
 def convert_to_utc(year, month, day, hour, minute, timezone="America/New_York"):
@@ -241,3 +545,30 @@ def get_prompt_template(source: str) -> str:
     )
     with open(filename, "r") as file:
         return file.read()
+
+
+def cluster_pending_items():
+    """
+    Clusters feed items stored without clustering, such as bulk loads, one batch
+    per write so ingest writes can interleave. Returns the number clustered.
+    """
+    clustered = 0
+    try:
+        batch = DEDUP_BATCH_SIZE
+        while batch == DEDUP_BATCH_SIZE:
+            batch = run_write(store_pending_clusters)
+            clustered += batch
+    except Exception as e:
+        logging.error(f"An error occurred in clustering feed items: {e}")
+    return clustered
+
+
+def store_pending_clusters(db):
+    """
+    Writer batch for cluster_pending_items.
+    """
+    clustered = cluster_unclustered_items(db, DEDUP_BATCH_SIZE)
+    if clustered:
+        # Collapsed feeds change as items join clusters
+        bump_generation(db)
+    return clustered
@@ -0,0 +1,157 @@
+from sqlalchemy import column, literal_column, select, table, text
+from sqlalchemy.orm import Session
+import re
+
+# Full-text index over feed titles and schedule descriptions/locations. Both tables
+# share it, so each row's FTS rowid encodes its origin: id * 2 for feed items and
+# id * 2 + 1 for schedule entries. That keeps trigger updates to a rowid lookup.
+FEED_ITEM_KIND = 0
+PRESIDENT_SCHEDULE_KIND = 1
+
+search_index = table("search_index", column("rowid"), column("body"), column("location"))
+
+SEARCH_INDEX_DDL = [
+    """
+    CREATE VIRTUAL TABLE search_index USING fts5(
+        body, location, tokenize='porter unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS feed_items_search_insert AFTER INSERT ON feed_items BEGIN
+        INSERT INTO search_index(rowid, body) VALUES (new.id * 2, new.title);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS feed_items_search_delete AFTER DELETE ON feed_items BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS feed_items_search_update AFTER UPDATE OF title ON feed_items BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2;
+        INSERT INTO search_index(rowid, body) VALUES (new.id * 2, new.title);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS president_schedule_search_insert AFTER INSERT ON president_schedule BEGIN
+        INSERT INTO search_index(rowid, body, location)
+        VALUES (new.id * 2 + 1, new.description, new.location);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS president_schedule_search_delete AFTER DELETE ON president_schedule BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2 + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS president_schedule_search_update
+    AFTER UPDATE OF description, location ON president_schedule BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2 + 1;
+        INSERT INTO search_index(rowid, body, location)
+        VALUES (new.id * 2 + 1, new.description, new.location);
+    END
+    """,
+]
+
+# Archived rows keep their ids, and so their rowids. The hot table's delete trigger
+# drops a row from the index before the archive's insert trigger adds it back.
+ARCHIVE_SEARCH_INDEX_DDL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS feed_items_archive_search_insert
+    AFTER INSERT ON feed_items_archive BEGIN
+        INSERT INTO search_index(rowid, body) VALUES (new.id * 2, new.title);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS feed_items_archive_search_delete
+    AFTER DELETE ON feed_items_archive BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS president_schedule_archive_search_insert
+    AFTER INSERT ON president_schedule_archive BEGIN
+        INSERT INTO search_index(rowid, body, location)
+        VALUES (new.id * 2 + 1, new.description, new.location);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS president_schedule_archive_search_delete
+    AFTER DELETE ON president_schedule_archive BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2 + 1;
+    END
+    """,
+]
+
+SEARCH_INDEX_BACKFILL = [
+    "INSERT INTO search_index(rowid, body) SELECT id * 2, title FROM feed_items",
+    """
+    INSERT INTO search_index(rowid, body, location)
+    SELECT id * 2 + 1, description, location FROM president_schedule
+    """,
+    "INSERT INTO search_index(rowid, body) SELECT id * 2, title FROM feed_items_archive",
+    """
+    INSERT INTO search_index(rowid, body, location)
+    SELECT id * 2 + 1, description, location FROM president_schedule_archive
+    """,
+]
+
+
+def create_search_index(db: Session):
+    """
+    Creates the FTS5 index and the triggers that keep it in sync at ingest time,
+    indexing existing rows the first time it's created.
+    """
+    exists = db.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'")
+    ).first()
+    for statement in SEARCH_INDEX_DDL[1 if exists else 0:] + ARCHIVE_SEARCH_INDEX_DDL:
+        db.execute(text(statement))
+    if not exists:
+        for statement in SEARCH_INDEX_BACKFILL:
+            db.execute(text(statement))
+    db.commit()
+
+
+def build_match_query(search_term: str):
+    """
+    Converts a user search into an FTS5 query. "Quoted text" matches as a phrase and
+    every other word matches as a prefix, so partially typed words still find results.
+    Returns None if the search contains nothing searchable.
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', search_term):
+        if phrase.strip():
+            terms.append(f'"{phrase}"')
+        else:
+            word = word.replace('"', "").rstrip("*")
+            if re.search(r"\w", word):
+                terms.append(f'"{word}"*')
+    return " ".join(terms) or None
+
+
+def matching_ids(match_query: str, kind: int):
+    """
+    Subquery of feed item (kind=FEED_ITEM_KIND) or schedule (kind=PRESIDENT_SCHEDULE_KIND)
+    ids matching an FTS5 query.
+    """
+    rowid = search_index.c.rowid
+    return select(rowid.op("/")(2)).where(
+        literal_column("search_index").match(match_query),
+        rowid.op("%")(2) == kind,
+    )
+
+
+def ranked_matches(db: Session, match_query: str, limit: int, offset: int):
+    """
+    Returns (kind, id) pairs for the best matches, ordered by BM25 relevance.
+    """
+    rowid = search_index.c.rowid
+    rows = db.execute(
+        select(rowid)
+        .where(literal_column("search_index").match(match_query))
+        .order_by(literal_column("rank"))
+        .offset(offset)
+        .limit(limit)
+    )
+    return [(row.rowid % 2, row.rowid // 2) for row in rows]
@@ -0,0 +1,86 @@
+import logging
+import os
+import tempfile
+
+from app.api import POTUS_SCHEDULE_SOURCE, RSS_ITEM_COUNT, feed_response, session_info_response
+from app.database import ReadSessionLocal, engine
+from app.responses import render_json, render_rss
+from app.utils import RSS_FEEDS
+
+# Where the precomputed responses are written after each ingest that adds rows,
+# next to the database by default so every process sharing it can serve them.
+# Empty disables snapshots.
+SNAPSHOT_DIR = os.environ.get(
+    "SNAPSHOT_DIR", os.path.join(os.path.dirname(engine.url.database or ""), "snapshots")
+)
+
+# Sources each front-end page checks by default, by page name
+FEED_PAGES = {
+    "congress": [
+        "white-house-legislation",
+        "house-rules-committee",
+        "senateppg-twitter",
+        "housedailypress-twitter",
+        "gao-reports",
+    ],
+    "executive": [
+        "white-house-presidential-actions",
+        "white-house-legislation",
+        "doj-olc-opinions",
+        POTUS_SCHEDULE_SOURCE,
+    ],
+    "military": ["dsca-major-arms-sales"],
+}
+
+# Every source that's actually ingested
+INGESTED_SOURCES = [source for _, source in RSS_FEEDS] + [POTUS_SCHEDULE_SOURCE]
+
+# The first /feed page of each `sources` group, by file name: the index page, each
+# front-end page limited to the sources that are ingested, and each ingested source
+FEED_SNAPSHOTS = {
+    "feed": "",
+    **{
+        page: ",".join(source for source in sources if source in INGESTED_SOURCES)
+        for page, sources in FEED_PAGES.items()
+    },
+    **{source: source for source in INGESTED_SOURCES},
+}
+
+
+def write_snapshots():
+    """
+    Renders the default /feed page of each FEED_SNAPSHOTS group, session info, and
+    the RSS feed, and writes them to SNAPSHOT_DIR. The bodies are identical to the
+    API's responses.
+    """
+    if not SNAPSHOT_DIR:
+        return
+    try:
+        with ReadSessionLocal() as db:
+            snapshots = {
+                f"{name}.json": render_json(feed_response(db, "", sources, 100, 0, ""))
+                for name, sources in FEED_SNAPSHOTS.items()
+            }
+            snapshots["session-info.json"] = render_json(session_info_response(db))
+            snapshots["feed.xml"] = render_rss(feed_response(db, "", "", RSS_ITEM_COUNT, 0, ""))
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        for file_name, body in snapshots.items():
+            write_atomically(os.path.join(SNAPSHOT_DIR, file_name), body)
+    except Exception as e:
+        logging.error(f"An error occurred in writing snapshots: {e}")
+
+
+def write_atomically(path: str, body: bytes):
+    """
+    Replaces the file in one step, so it's never served half-written.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as temp_file:
+            temp_file.write(body)
+        # mkstemp creates the file readable only by its owner
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except Exception:
+        os.unlink(temp_path)
+        raise
@@ -1,8 +1,12 @@
+import hashlib
 import pytz
 from datetime import datetime
 import logging
+import os
 import requests
 
+from app import http_client
+
 RSS_FEEDS = [
     ("https://rules.house.gov/rss.xml", "house-rules-committee"),
     (
@@ -21,6 +25,9 @@ RSS_FEEDS = [
     ),
 ]
 
+# Number of feeds fetched in parallel
+FEED_FETCH_CONCURRENCY = int(os.environ.get("FEED_FETCH_CONCURRENCY", 6))
+
 def convert_to_utc(date, timezone):
     try:
         local_tz = pytz.timezone(timezone)
@@ -34,14 +41,67 @@ def convert_to_utc(date, timezone):
         return None
 
 def current_time():
-    print(datetime.now(pytz.utc))
     return datetime.now(pytz.utc)
 
-def fetch(url):
+def fetch(url, timeout=None, validators=None, stream=False):
+    """
+    GETs a URL through the shared HTTP client, sending If-None-Match/If-Modified-Since
+    when cached validators are given. Returns None on failure. With stream, the
+    caller reads the body from response.raw and must close the response.
+    """
+    headers = {}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        return response
+        return http_client.get(url, headers=headers, timeout=timeout, stream=stream)
     except requests.exceptions.RequestException as e:
         logging.error(f"Error fetching data from {url}: {e}")
         return None
+
+
+def content_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+class HashingReader:
+    """
+    File-like wrapper over a streamed response body that computes its content_hash
+    and size as it is read, and stops at the request's deadline if given.
+    """
+
+    def __init__(self, raw, deadline=None):
+        # Read the body as requests would return it, without any Content-Encoding
+        raw.decode_content = True
+        self.raw = raw
+        self.deadline = deadline
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size=-1):
+        if self.deadline is None:
+            chunk = self.raw.read(None if size is None or size < 0 else size)
+        else:
+            http_client.check_deadline(self.deadline)
+            # Returns whatever has arrived, so the deadline is checked as the body trickles in
+            chunk = self.raw.read1(None if size is None or size < 0 else size)
+        self.hash.update(chunk)
+        self.size += len(chunk)
+        return chunk
+
+    def hexdigest(self):
+        # Hash whatever the parser left unread, so it covers the whole body
+        while self.read(64 * 1024):
+            pass
+        return self.hash.hexdigest()
+
+
+def is_not_modified(response, validators):
+    """
+    True if the server answered 304, or the body is identical to the last one we processed.
+    """
+    if response.status_code == 304:
+        return True
+    return bool(validators) and validators.get("content_hash") == content_hash(response.content)
@@ -0,0 +1,40 @@
+"""
+Dedicated ingest process, for deployments that run the web app with INGEST_MODE=worker:
+
+    python -m app.worker
+
+Only one worker runs the jobs at a time; extra workers wait on the ingest lock as standbys.
+"""
+from apscheduler.events import EVENT_JOB_SUBMITTED
+from apscheduler.schedulers.blocking import BlockingScheduler
+from prometheus_client import start_http_server
+import logging
+import os
+
+from app.database import engine
+from app.ingest import acquire_ingest_lock, add_ingest_jobs, migrate_database
+from app.metrics import instrument_engine, record_job_lag
+
+# Ingest metrics are served from here, since this process does the fetching; 0 disables it
+WORKER_METRICS_PORT = int(os.environ.get("WORKER_METRICS_PORT", 9091))
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    migrate_database()
+    instrument_engine(engine)
+    if WORKER_METRICS_PORT:
+        start_http_server(WORKER_METRICS_PORT)
+
+    logging.info("Waiting for the ingest lock")
+    acquire_ingest_lock(blocking=True)
+    logging.info("Running the ingest jobs")
+
+    scheduler = BlockingScheduler()
+    scheduler.add_listener(record_job_lag, EVENT_JOB_SUBMITTED)
+    add_ingest_jobs(scheduler)
+    scheduler.start()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+from concurrent.futures import Future
+import os
+import queue
+import threading
+
+from app.database import SessionLocal
+
+# Batches waiting for the writer; submitting blocks while the queue is full
+WRITE_QUEUE_SIZE = int(os.environ.get("WRITE_QUEUE_SIZE", 100))
+
+_queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+_writer_thread = None
+_writer_lock = threading.Lock()
+
+
+def submit_write(write, *args):
+    """
+    Queues write(db, *args) to run on the single writer connection, in its own
+    transaction. Returns a Future for write's return value; the transaction is
+    committed if write returns and rolled back if it raises.
+    """
+    start_writer()
+    future = Future()
+    _queue.put((future, write, args))
+    return future
+
+
+def run_write(write, *args):
+    """
+    Runs write(db, *args) on the writer and waits for its result.
+    """
+    return submit_write(write, *args).result()
+
+
+def start_writer():
+    global _writer_thread
+    with _writer_lock:
+        if _writer_thread is None:
+            _writer_thread = threading.Thread(target=process_writes, name="db-writer", daemon=True)
+            _writer_thread.start()
+
+
+def process_writes():
+    """
+    Applies queued batches one at a time, so ingest jobs never contend for the
+    write lock with each other.
+    """
+    while True:
+        future, write, args = _queue.get()
+        if not future.set_running_or_notify_cancel():
+            continue
+        db = SessionLocal()
+        try:
+            result = write(db, *args)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+        finally:
+            db.close()
@@ -0,0 +1,102 @@
+"""
+Fills a SQLite database with synthetic FeedItem/PresidentSchedule rows.
+
+    DB_FILENAME=sqlite:///bench.db python -m bench.generate --rows 100000
+"""
+from datetime import datetime, timedelta
+import argparse
+import os
+import random
+
+WORDS = (
+    "act amendment appropriations arms bill budget cloture committee continuing "
+    "defense emergency energy executive farm foreign health hearing house joint "
+    "markup nato nomination order proclamation reconciliation resolution rule "
+    "sale security senate session signed treaty vote veterans"
+).split()
+
+FEED_SOURCES = [
+    "house-rules-committee",
+    "white-house-legislation",
+    "white-house-presidential-actions",
+    "senateppg-twitter",
+    "housedailypress-twitter",
+    "dsca-major-arms-sales",
+]
+# Roughly how often each source posts relative to the others
+SOURCE_WEIGHTS = [10, 3, 5, 30, 40, 1]
+
+BATCH_SIZE = 5000
+
+
+def synthetic_title(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 14))).capitalize()
+
+
+def feed_rows(count, rng, end):
+    for i in range(count):
+        pub_date = end - timedelta(seconds=rng.randint(0, 5 * 365 * 24 * 60 * 60))
+        yield {
+            "title": f"{synthetic_title(rng)} {i}",
+            "link": f"https://example.com/item/{i}",
+            "pubDate": pub_date,
+            "source": rng.choices(FEED_SOURCES, SOURCE_WEIGHTS)[0],
+        }
+
+
+def schedule_rows(count, rng, end):
+    for i in range(count):
+        yield {
+            "link": f"https://example.com/schedule/{i}",
+            "location": rng.choice(["", "The White House", "Oval Office", "Camp David"]),
+            "time": (end - timedelta(minutes=30 * i)).replace(second=0, microsecond=0),
+            "description": f"The President {synthetic_title(rng).lower()} {i}",
+            "press_information": rng.choice(["Closed Press", "Open Press", "Pool Spray"]),
+        }
+
+
+def generate(feed_count, schedule_count, seed=0, cluster=False):
+    """
+    Creates the schema (including the search index) and inserts the synthetic rows
+    through the same bulk insert paths the ingest jobs use. Like any bulk load, the
+    items are left for the ingest job to cluster unless cluster is set.
+    """
+    from app.crud import add_feed_item, get_db, sync_president_schedule, upgrade_schema
+    from app.database import Base, engine
+    from app.dedup import DEDUP_BATCH_SIZE, cluster_unclustered_items
+
+    Base.metadata.create_all(bind=engine)
+    db = next(get_db())
+    upgrade_schema(db)
+
+    rng = random.Random(seed)
+    end = datetime(2024, 12, 31)
+    batch = []
+    for row in feed_rows(feed_count, rng, end):
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            add_feed_item(db, batch, cluster=False)
+            db.commit()
+            batch = []
+    add_feed_item(db, batch, cluster=False)
+    sync_president_schedule(db, schedule_rows(schedule_count, rng, end))
+    db.commit()
+    while cluster and cluster_unclustered_items(db, DEDUP_BATCH_SIZE):
+        db.commit()
+    db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000, help="number of feed items")
+    parser.add_argument("--schedule-rows", type=int, help="number of schedule entries (default rows / 10)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cluster", action="store_true", help="cluster near-duplicate items too")
+    args = parser.parse_args()
+    if "DB_FILENAME" not in os.environ:
+        parser.error("DB_FILENAME must point at the database to fill")
+    generate(args.rows, args.schedule_rows if args.schedule_rows is not None else args.rows // 10, args.seed, args.cluster)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Benchmarks /feed query latency and ingest throughput against a synthetic archive,
+with every upstream host replaced by a local fixture server and the LLM stubbed out.
+Results are written as JSON so runs can be compared.
+
+    python -m bench.run --sizes 10000 100000 1000000 --output bench_results.json
+"""
+from datetime import datetime, timezone
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ENDPOINT_SCENARIOS = {
+    "default": "/feed?limit=100",
+    "sources": "/feed?limit=100&sources=dsca-major-arms-sales,white-house-legislation",
+    "rare-source": "/feed?limit=100&sources=dsca-major-arms-sales",
+    "text-search": "/feed?limit=100&search_term=arms%20sale",
+    "date-search": "/feed?limit=100&search_term=June%203,%202024",
+    "deep-offset": "/feed?limit=100&offset=5000",
+    "relevance-search": "/search?limit=100&search_term=nato",
+}
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(samples):
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 3),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 3),
+        "requests": len(samples),
+    }
+
+
+def bench_endpoints(client, repeat):
+    """
+    Times each scenario with the response cache cleared before every request, plus
+    the default page served from the cache.
+    """
+    from app.cache import response_cache
+
+    results = {}
+    for name, url in ENDPOINT_SCENARIOS.items():
+        samples = []
+        for _ in range(repeat):
+            response_cache.clear()
+            start = time.perf_counter()
+            client.get(url)
+            samples.append(time.perf_counter() - start)
+        results[name] = summarize(samples)
+
+    samples = []
+    client.get(ENDPOINT_SCENARIOS["default"])
+    for _ in range(repeat):
+        start = time.perf_counter()
+        client.get(ENDPOINT_SCENARIOS["default"])
+        samples.append(time.perf_counter() - start)
+    results["default-cached"] = summarize(samples)
+    return results
+
+
+def count_rows(db):
+    from app.models import FeedItem, PresidentSchedule
+
+    return db.query(FeedItem).count() + db.query(PresidentSchedule).count()
+
+
+def bench_ingest(base_url):
+    """
+    Runs each ingest job once against the fixture server, forcing every feed to be
+    due and every source to be re-downloaded, and reports rows/sec.
+    """
+    from app import rss_fetcher
+    from app.crud import get_db
+    from app.models import HttpCache, SourceSchedule, SyncState
+    from app.utils import RSS_FEEDS
+
+    RSS_FEEDS[:] = [(f"{base_url}/{source}.xml", source) for _, source in RSS_FEEDS]
+    rss_fetcher.PRESIDENT_SCHEDULE_URL = f"{base_url}/calendar-full.json"
+    rss_fetcher.SENATE_FLOOR_SCHEDULE_URL = f"{base_url}/floor_schedule.json"
+    rss_fetcher.HOUSE_IN_SESSION_URL = f"{base_url}/in-session"
+    rss_fetcher.send_prompt = lambda prompt, parse=str: parse(datetime.now(timezone.utc).isoformat())
+
+    jobs = {
+        "rss": rss_fetcher.fetch_and_store_rss,
+        "president-schedule": rss_fetcher.fetch_president_schedule,
+        "session-info": rss_fetcher.fetch_session_info,
+    }
+    results = {}
+    for name, job in jobs.items():
+        db = next(get_db())
+        for model in (HttpCache, SourceSchedule, SyncState):
+            db.query(model).delete()
+        db.commit()
+        rows_before = count_rows(db)
+
+        start = time.perf_counter()
+        job()
+        elapsed = time.perf_counter() - start
+
+        rows = count_rows(db) - rows_before
+        db.close()
+        results[name] = {
+            "seconds": round(elapsed, 4),
+            "rows": rows,
+            "rows_per_sec": round(rows / elapsed, 1) if elapsed else None,
+        }
+    return results
+
+
+def bench_size(size, args, fixtures_url):
+    """
+    Runs every scenario against a fresh database of the given size, in a child
+    process so each size gets its own engine and module state.
+    """
+    import subprocess
+
+    db_path = os.path.join(args.workdir, f"bench-{size}.db")
+    if not os.path.exists(db_path):
+        subprocess.run(
+            [sys.executable, "-m", "bench.generate", "--rows", str(size)],
+            env={**os.environ, "DB_FILENAME": f"sqlite:///{db_path}"},
+            check=True,
+        )
+    output = subprocess.run(
+        [sys.executable, "-m", "bench.run", "--single", fixtures_url, "--repeat", str(args.repeat)],
+        env={**os.environ, "DB_FILENAME": f"sqlite:///{db_path}"},
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def run_single(fixtures_url, repeat):
+    # Keep the background warm-up and polling jobs out of the measurements
+    os.environ["INGEST_MODE"] = "worker"
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        endpoints = bench_endpoints(client, repeat)
+    ingest = bench_ingest(fixtures_url)
+    print(json.dumps({"endpoints": endpoints, "ingest": ingest}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=50, help="requests per endpoint scenario")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--workdir", default=tempfile.gettempdir(), help="where benchmark databases are kept")
+    parser.add_argument("--fixtures", default=os.path.join("bench", "fixtures"))
+    parser.add_argument("--single", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        run_single(args.single, args.repeat)
+        return
+
+    from bench.upstream import serve, write_fixtures
+    from app.utils import RSS_FEEDS
+
+    write_fixtures(args.fixtures, [source for _, source in RSS_FEEDS])
+    server = serve(args.fixtures)
+    fixtures_url = f"http://127.0.0.1:{server.server_port}"
+
+    results = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "repeat": args.repeat,
+        "sizes": {},
+    }
+    for size in args.sizes:
+        print(f"Benchmarking {size} rows...", file=sys.stderr)
+        results["sizes"][str(size)] = bench_size(size, args, fixtures_url)
+    server.shutdown()
+
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Local stand-in for the upstream hosts: serves RSS feeds, calendar-full.json,
+floor_schedule.json and in-session.house.gov from a fixtures directory. Recorded
+responses can be dropped into the directory; anything missing is synthesized.
+
+    python -m bench.upstream --port 8765 --fixtures bench/fixtures
+"""
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+import argparse
+import json
+import os
+import random
+import threading
+
+FEED_ENTRIES = 50
+CALENDAR_ENTRIES = 20000
+
+
+def feed_fixture_name(source):
+    return f"{source}.xml"
+
+
+def synthesize_feed(source, rng, now, entries=FEED_ENTRIES):
+    items = []
+    for i in range(entries):
+        pub_date = now - timedelta(hours=i * rng.uniform(0.5, 6))
+        items.append(
+            "<item>"
+            f"<title>{escape(source)} update {rng.getrandbits(32)} {i}</title>"
+            f"<link>https://example.com/{source}/{rng.getrandbits(32)}</link>"
+            f"<pubDate>{format_datetime(pub_date)}</pubDate>"
+            "</item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        f"<title>{escape(source)}</title>{''.join(items)}</channel></rss>"
+    )
+
+
+def synthesize_calendar(rng, now, entries=CALENDAR_ENTRIES):
+    calendar = []
+    for i in range(entries):
+        day = (now - timedelta(hours=6 * i)).date()
+        calendar.append(
+            {
+                "date": day.isoformat(),
+                "time": rng.choice([None, "09:00:00", "11:30:00", "14:15:00"]),
+                "details": f"The President participates in event {i}",
+                "location": rng.choice([None, "The White House", "Oval Office"]),
+                "url": f"https://example.com/calendar/{i}",
+                "coverage": rng.choice(["Closed Press", "Open Press"]),
+            }
+        )
+    return json.dumps(calendar)
+
+
+def synthesize_floor_schedule(now):
+    convene = now + timedelta(days=1)
+    return json.dumps(
+        {
+            "floorProceedings": [
+                {
+                    "conveneYear": str(convene.year),
+                    "conveneMonth": str(convene.month),
+                    "conveneDay": str(convene.day),
+                    "conveneHour": "10",
+                    "conveneMinutes": "00",
+                    "convenedSessionStream": "https://www.senate.gov/isvp/",
+                }
+            ]
+        }
+    )
+
+
+def write_fixtures(directory, sources, seed=0):
+    """
+    Synthesizes any fixture that isn't already in the directory.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    fixtures = {feed_fixture_name(source): partial(synthesize_feed, source, rng, now) for source in sources}
+    fixtures["calendar-full.json"] = partial(synthesize_calendar, rng, now)
+    fixtures["floor_schedule.json"] = partial(synthesize_floor_schedule, now)
+    fixtures["in-session"] = lambda: "0"
+    for name, synthesize in fixtures.items():
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            with open(path, "w") as file:
+                file.write(synthesize())
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(directory, port=0):
+    """
+    Starts the server on a background thread and returns it; server.server_port
+    holds the bound port.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), partial(QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    from app.utils import RSS_FEEDS
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures", default="bench/fixtures")
+    args = parser.parse_args()
+    write_fixtures(args.fixtures, [source for _, source in RSS_FEEDS])
+    server = serve(args.fixtures, args.port)
+    print(f"Serving {args.fixtures} on http://127.0.0.1:{server.server_port}")
+    threading.Event().wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The app reads its settings at import time, so they're set before anything imports it
+_data_dir = tempfile.mkdtemp(prefix="congressrss-tests-")
+os.environ["DB_FILENAME"] = f"sqlite:///{os.path.join(_data_dir, 'test.db')}"
+os.environ["INGEST_MODE"] = "worker"
+os.environ["GENERATION_CHECK_INTERVAL"] = "0"
+os.environ["SNAPSHOT_DIR"] = os.path.join(_data_dir, "snapshots")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+from app.cache import response_cache  # noqa: E402
+from app.database import Base, SessionLocal  # noqa: E402
+from app.ingest import migrate_database  # noqa: E402
+
+migrate_database()
+
+
+@pytest.fixture
+def db():
+    """
+    A writer session on an emptied database. Rows are deleted rather than the
+    tables dropped, so the triggers keep the search index and counts in step.
+    """
+    with SessionLocal() as session:
+        for table in reversed(Base.metadata.sorted_tables):
+            session.execute(table.delete())
+        session.commit()
+        response_cache.clear()
+        yield session
+        session.rollback()
+
+
+@pytest.fixture
+def client(db):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    return TestClient(app)
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from app.archive import move_batch, set_archived_before
+from app.crud import add_feed_item
+from app.models import FeedItem, FeedItemArchive, PresidentScheduleArchive
+from app.rss_fetcher import FetchedFeed, store_fetched_feeds, store_president_schedule
+
+
+def feed_items(*days):
+    return [
+        {
+            "title": f"GAO report {day}",
+            "link": f"https://www.gao.gov/products/{day}",
+            "pubDate": datetime(2024, 1, 1) + timedelta(days=day),
+            "source": "gao-reports",
+        }
+        for day in days
+    ]
+
+
+def test_archived_ids_are_not_reused(db, client):
+    add_feed_item(db, feed_items(0, 1, 2))
+    db.commit()
+    archived_ids = {item_id for item_id, in db.query(FeedItem.id)}
+    move_batch(db, FeedItem, FeedItemArchive, "pubDate", datetime(2025, 1, 1))
+    db.commit()
+
+    add_feed_item(db, feed_items(400))
+    db.commit()
+    new_id, = db.query(FeedItem.id).one()
+    assert new_id > max(archived_ids)
+
+    response = client.get("/search", params={"search_term": "GAO report"})
+    links = [item["link"] for item in response.json()["data"]]
+    assert sorted(links) == sorted(item["link"] for item in feed_items(0, 1, 2, 400))
+
+
+def test_entries_older_than_the_cutoff_are_stored_in_the_archive(db, client):
+    cutoff = datetime(2024, 6, 1)
+    set_archived_before(db, cutoff)
+    db.commit()
+    response = SimpleNamespace(headers={}, content=b"")
+    old_entry = {
+        "title": "GAO report on legacy systems",
+        "link": "https://www.gao.gov/products/gao-24-1",
+        "published_parsed": datetime(2024, 3, 1, 12).timetuple(),
+    }
+    new_entry = {
+        "title": "GAO report on cloud migration",
+        "link": "https://www.gao.gov/products/gao-24-2",
+        "published_parsed": datetime(2024, 6, 3).timetuple(),
+    }
+    old_meeting = {
+        "link": None,
+        "location": "The White House",
+        "time": datetime(2024, 2, 1, 15, tzinfo=timezone.utc),
+        "description": "The President receives the President's Daily Brief",
+        "press_information": "Closed Press",
+    }
+    now = datetime(2024, 6, 4)
+    for _ in range(2):
+        entries = [old_entry, new_entry]
+        feed = FetchedFeed("https://www.gao.gov/rss/reports.xml", "gao-reports", response, entries, [], None)
+        store_fetched_feeds(db, [feed], {}, {}, now)
+        db.commit()
+        store_president_schedule(db, [old_meeting], None, response, "hash")
+        db.commit()
+
+    assert db.query(FeedItem).count() == 1
+    assert db.query(FeedItemArchive).count() == 1
+    assert db.query(PresidentScheduleArchive).count() == 1
+    archived_id, = db.query(FeedItemArchive.id).one()
+    assert archived_id != db.query(FeedItem.id).scalar()
+
+    assert feed_links(client, sources="gao-reports") == [new_entry["link"], old_entry["link"]]
+    schedule = client.get("/feed", params={"sources": "potus-schedule"}).json()["data"] or []
+    assert [item["title"] for item in schedule] == [f"{old_meeting['description']} (The White House)"]
+    search = client.get("/search", params={"search_term": "legacy"}).json()["data"]
+    assert [item["link"] for item in search] == [old_entry["link"]]
+
+
+def feed_links(client, **params):
+    return [item["link"] for item in client.get("/feed", params=params).json()["data"] or []]
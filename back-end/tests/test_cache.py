@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from app.cache import etag_matches, response_cache
+from app.crud import add_feed_item
+
+ITEM = {
+    "title": "Bills Signed: H.R. 366",
+    "link": "https://www.whitehouse.gov/366",
+    "pubDate": datetime(2024, 6, 3, 12),
+    "source": "white-house-legislation",
+}
+
+
+def test_etag_matches_whole_tags_only():
+    etag = 'W/"abc"'
+    assert etag_matches('W/"abc"', etag)
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('"x", W/"abc"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('W/"abcd"', etag)
+    assert not etag_matches('W/"ab"', etag)
+    assert not etag_matches("", etag)
+
+
+def test_feed_revalidates_with_etag(db, client):
+    add_feed_item(db, [ITEM])
+    db.commit()
+    response = client.get("/feed")
+    etag = response.headers["etag"]
+    assert client.get("/feed", headers={"If-None-Match": f'"other", {etag}'}).status_code == 304
+    assert client.get("/feed", headers={"If-None-Match": etag[:-2] + '"'}).status_code == 200
+
+
+
+def test_default_parameters_share_a_cache_entry(db, client):
+    add_feed_item(db, [ITEM])
+    db.commit()
+    etag = client.get("/feed").headers["etag"]
+    for url in ("/feed?limit=100", "/feed?offset=0&collapse=false&search_term=", "/feed?_=123"):
+        assert client.get(url).headers["etag"] == etag
+    assert len(response_cache.entries) == 1
+
+    client.get("/feed?limit=10")
+    client.get("/feed?collapse=1")
+    client.get("/feed?collapse=true")
+    assert len(response_cache.entries) == 3
@@ -0,0 +1,32 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app import contact_llm
+from app.models import LlmCache
+
+
+class FakeClient:
+    def __init__(self, answers):
+        self.answers = answers
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, **kwargs):
+        message = SimpleNamespace(content=self.answers.pop(0))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def test_only_parsed_answers_are_cached(db, monkeypatch):
+    client = FakeClient([" The House meets on Tuesday", " 2024-07-02T12:00:00"])
+    monkeypatch.setattr(contact_llm, "get_client", lambda: client)
+
+    with pytest.raises(ValueError):
+        contact_llm.send_prompt("When does the House meet?", parse=datetime.fromisoformat)
+    assert db.query(LlmCache).count() == 0
+
+    expected = datetime(2024, 7, 2, 12)
+    assert contact_llm.send_prompt("When does the House meet?", parse=datetime.fromisoformat) == expected
+    assert contact_llm.send_prompt("When does the House meet?", parse=datetime.fromisoformat) == expected
+    assert client.answers == []
+    assert db.query(LlmCache).count() == 1
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+from app.archive import move_batch, set_archived_before
+from app.crud import add_feed_item
+from app.dedup import DEDUP_THRESHOLD, cluster_unclustered_items, minhash, similarity
+from app.models import FeedItem, FeedItemArchive
+from app.rss_fetcher import store_pending_clusters
+
+FIRST = {
+    "title": "Press Release: Bills Signed: H.R. 366, H.R. 1226 https://t.co/abc",
+    "link": "https://twitter.com/WhiteHouse/status/1",
+    "pubDate": datetime(2024, 6, 3, 12),
+    "source": "white-house-legislation",
+}
+DUPLICATE = {
+    "title": "Press Release: Bills Signed: H.R. 366, H.R. 1226 and H.R. 7 https://nitter.net/abc",
+    "link": "https://nitter.net/WhiteHouse/status/1",
+    "pubDate": datetime(2024, 6, 3, 14),
+    "source": "white-house-presidential-actions",
+}
+UNRELATED = {
+    "title": "Rules Committee Hearing on H.R. 8070",
+    "link": "https://rules.house.gov/bill/118/hr-8070",
+    "pubDate": datetime(2024, 6, 3, 13),
+    "source": "house-rules-committee",
+}
+
+
+def feed_links(client, **params):
+    response = client.get("/feed", params={"collapse": "true", **params})
+    return [item["link"] for item in response.json()["data"] or []]
+
+
+def test_similar_titles_have_similar_signatures():
+    assert similarity(minhash(FIRST["title"]), minhash(DUPLICATE["title"])) >= DEDUP_THRESHOLD
+    assert similarity(minhash(FIRST["title"]), minhash(UNRELATED["title"])) < DEDUP_THRESHOLD
+    assert minhash("") is None
+
+
+def test_near_duplicates_share_a_cluster(db):
+    later = {**DUPLICATE, "link": "https://nitter.net/x/2", "pubDate": FIRST["pubDate"] + timedelta(days=30)}
+    add_feed_item(db, [FIRST])
+    add_feed_item(db, [DUPLICATE, UNRELATED, later])
+    db.commit()
+    clusters = {item.link: (item.id, item.cluster_id) for item in db.query(FeedItem)}
+    first_id = clusters[FIRST["link"]][0]
+    assert clusters[FIRST["link"]][1] == first_id
+    assert clusters[DUPLICATE["link"]][1] == first_id
+    assert clusters[UNRELATED["link"]][1] == clusters[UNRELATED["link"]][0]
+    # Too far apart to be the same announcement
+    assert clusters[later["link"]][1] == clusters[later["link"]][0]
+
+
+def test_bulk_loaded_items_are_clustered_later(db):
+    add_feed_item(db, [FIRST], cluster=False)
+    add_feed_item(db, [DUPLICATE, UNRELATED], cluster=False)
+    db.commit()
+    assert db.query(FeedItem).filter(FeedItem.cluster_id.is_(None)).count() == 3
+
+    # The first item is stored before the rest are clustered, so they find it in the index
+    assert cluster_unclustered_items(db, 1) == 1
+    assert store_pending_clusters(db) == 2
+    assert store_pending_clusters(db) == 0
+    db.commit()
+    clusters = {item.link: (item.id, item.cluster_id) for item in db.query(FeedItem)}
+    first_id = clusters[FIRST["link"]][0]
+    assert clusters[DUPLICATE["link"]][1] == first_id
+    assert clusters[UNRELATED["link"]][1] == clusters[UNRELATED["link"]][0]
+
+
+def test_collapse_lists_each_cluster_once(db, client):
+    add_feed_item(db, [FIRST, DUPLICATE, UNRELATED])
+    db.commit()
+    assert feed_links(client) == [UNRELATED["link"], FIRST["link"]]
+    assert len(feed_links(client, collapse="false")) == 3
+    # The duplicate is kept when its first item isn't in the results
+    assert feed_links(client, sources=DUPLICATE["source"]) == [DUPLICATE["link"]]
+    assert feed_links(client, **{"from": "2024-06-03T13:00:00"}) == [DUPLICATE["link"], UNRELATED["link"]]
+    assert feed_links(client, to="2024-06-03T11:00:00") == []
+    assert feed_links(client, search_term="7") == [DUPLICATE["link"]]
+    assert feed_links(client, search_term="1226") == [FIRST["link"]]
+
+
+def test_collapse_finds_first_items_in_the_archive(db, client):
+    add_feed_item(db, [FIRST, DUPLICATE])
+    db.commit()
+    cutoff = datetime(2024, 6, 3, 13)
+    set_archived_before(db, cutoff)
+    move_batch(db, FeedItem, FeedItemArchive, "pubDate", cutoff)
+    db.commit()
+    assert db.query(FeedItemArchive).count() == 1
+    assert feed_links(client) == [FIRST["link"]]
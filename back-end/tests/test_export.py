@@ -0,0 +1,38 @@
+from datetime import datetime
+import csv
+import io
+
+from app.crud import add_feed_item
+from app.models import FeedItem
+
+ITEMS = [
+    {
+        "title": "Taiwan – Harpoon Coastal Defense Systems",
+        "link": "https://www.dsca.mil/press-media/major-arms-sales/taiwan-harpoon",
+        "pubDate": datetime(2024, 6, 3, 12),
+        "source": "dsca-major-arms-sales",
+    },
+    {
+        "title": 'Rules Committee Hearing "H.R. 8070", with commas',
+        "link": "https://rules.house.gov/bill/118/hr-8070",
+        "pubDate": datetime(2024, 6, 4, 9, 30),
+        "source": "house-rules-committee",
+    },
+]
+
+
+def test_csv_export_of_stored_fragments(db, client):
+    add_feed_item(db, ITEMS)
+    db.commit()
+    assert db.query(FeedItem).filter(FeedItem.json_fragment.is_(None)).count() == 0
+
+    response = client.get("/export", params={"format": "csv"})
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["title"] for row in rows] == [item["title"] for item in reversed(ITEMS)]
+    assert rows[0]["pubDate"] == "2024-06-04T09:30:00"
+
+
+def test_export_rejects_invalid_parameters(db, client):
+    assert client.get("/export", params={"format": "xml"}).status_code == 400
+    assert client.get("/export", params={"from": "yesterday"}).status_code == 400
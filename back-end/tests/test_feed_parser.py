@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+import glob
+import os
+
+import pytest
+
+from app.feed_parser import (
+    SEEN_ENTRIES_BEFORE_EXIT,
+    parse_feed,
+    parse_incrementally,
+    parse_with_feedparser,
+)
+
+# Small copies of each upstream feed's format: namespaces, CDATA, entities, multi-line
+# titles and the date styles each one uses
+FIXTURES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "fixtures", "*.xml")))
+
+TRICKY_ITEMS = [
+    "<title>Bills &amp; Resolutions</title><link>https://x.gov/1?a=1&amp;b=2</link>",
+    "<title>A &lt;b&gt;bold&lt;/b&gt; move</title><link>https://x.gov/2</link>",
+    "<title><![CDATA[Fish & Chips <i>x</i>]]></title><link>https://x.gov/3</link>",
+    "<title>\n   Spaced   out\n  title  </title><link>\n https://x.gov/4 \n</link>",
+    "<title>Quote &#8220;this&#8221; &#x2014; ok</title><link>https://x.gov/5</link>",
+    "<title>R&amp;D &amp;amp; more</title><link>https://x.gov/6</link>",
+    "<title>Relative</title><link>/7</link>",
+]
+
+
+def rss(items):
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>c</title>'
+        + "".join(items)
+        + "</channel></rss>"
+    ).encode()
+
+
+def rss_items(count, newest=datetime(2024, 6, 3, 12)):
+    return [
+        f"<item><title>Item {i}</title><link>https://x.gov/{i}</link>"
+        f"<pubDate>{format_datetime(newest - timedelta(hours=i))}</pubDate></item>"
+        for i in range(count)
+    ]
+
+
+def comparable(entries):
+    return [(e["title"], e["link"], tuple(e["published_parsed"][:6])) for e in entries]
+
+
+def test_fixtures_are_present():
+    # An empty list would quietly skip the parametrized comparison below
+    assert len(FIXTURES) >= 4
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=os.path.basename)
+def test_fast_path_matches_feedparser_on_fixtures(path):
+    with open(path, "rb") as fixture:
+        content = fixture.read()
+    fast, fast_dates, fast_mark = parse_incrementally(content, None)
+    slow, slow_dates, slow_mark = parse_with_feedparser(content, None)
+    assert fast
+    assert comparable(fast) == comparable(slow)
+    assert (fast_dates, fast_mark) == (slow_dates, slow_mark)
+
+
+@pytest.mark.parametrize("item", TRICKY_ITEMS)
+def test_parse_feed_matches_feedparser_on_escaped_titles_and_links(item):
+    content = rss([item.replace("</link>", "</link><pubDate>Mon, 03 Jun 2024 12:00:00 GMT</pubDate>")])
+    fast = parse_feed(content)[0]
+    slow = parse_with_feedparser(content, None)[0]
+    assert comparable(fast) == comparable(slow)
+
+
+def test_exits_after_seen_entries_without_waiting_for_a_full_sample():
+    content = rss(rss_items(15))
+    _, _, mark = parse_feed(content)
+    entries, pub_dates, new_mark = parse_incrementally(content, mark)
+    assert entries == []
+    assert len(pub_dates) == SEEN_ENTRIES_BEFORE_EXIT
+    assert new_mark == mark
+
+
+def test_returns_only_entries_newer_than_the_mark():
+    content = rss(rss_items(15))
+    _, _, mark = parse_feed(rss(rss_items(15)[3:]))
+    entries, _, _ = parse_feed(content, mark)
+    assert [entry["title"] for entry in entries] == ["Item 0", "Item 1", "Item 2"]
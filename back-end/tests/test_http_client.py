@@ -0,0 +1,69 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import gzip
+import threading
+import time
+
+import pytest
+
+from app import http_client
+from app.utils import HashingReader, fetch
+
+
+class Upstream(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/trickle":
+            self.send_response(200)
+            self.send_header("Content-Length", "100")
+            self.end_headers()
+            for _ in range(100):
+                self.wfile.write(b"x")
+                self.wfile.flush()
+                time.sleep(0.05)
+            return
+        body = b"<rss/>"
+        self.send_response(503 if self.path == "/unavailable" else 200)
+        if self.path == "/gzip":
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    monkeypatch.setattr(http_client, "HTTP_TOTAL_TIMEOUT", 1)
+    monkeypatch.setattr(http_client, "HTTP_RETRY_BACKOFF", 0.3)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Upstream)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    http_client._breakers.clear()
+
+
+def test_fetch_reads_decoded_body(upstream):
+    assert fetch(f"{upstream}/plain").content == b"<rss/>"
+    assert fetch(f"{upstream}/gzip").content == b"<rss/>"
+
+
+def test_retries_stop_at_the_deadline(upstream):
+    started = time.monotonic()
+    assert fetch(f"{upstream}/unavailable") is None
+    assert time.monotonic() - started < 1.2
+
+
+def test_trickling_body_stops_at_the_deadline(upstream):
+    started = time.monotonic()
+    assert fetch(f"{upstream}/trickle") is None
+    assert time.monotonic() - started < 1.5
+
+    response = fetch(f"{upstream}/trickle", stream=True)
+    body = HashingReader(response.raw, response.deadline)
+    with pytest.raises(http_client.DeadlineExceeded):
+        while body.read(1024):
+            pass
+    response.close()
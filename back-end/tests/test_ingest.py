@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta, timezone
+
+from app.cache import GENERATION_KEY
+from app.crud import get_sync_state, update_source_schedule
+from app.models import SourceSchedule, SyncState
+from app.polling import MAX_POLL_INTERVAL, is_due
+from app.rss_fetcher import FetchedFeed, store_fetched_feeds, store_session_info
+
+NEXT_MEETING = datetime(2024, 7, 2, 16, tzinfo=timezone.utc)
+HOUSE_INFO = (0, NEXT_MEETING, "https://live.house.gov")
+SENATE_INFO = (1, NEXT_MEETING, "https://www.senate.gov/isvp/stv.html")
+
+
+def test_unchanged_session_info_is_not_rewritten(db):
+    assert store_session_info(db, HOUSE_INFO, SENATE_INFO, None)
+    db.commit()
+    generation = get_sync_state(db, GENERATION_KEY)
+
+    assert not store_session_info(db, HOUSE_INFO, SENATE_INFO, None)
+    assert not db.dirty and not db.new and not db.deleted
+    db.commit()
+    assert get_sync_state(db, GENERATION_KEY) == generation
+
+    assert store_session_info(db, HOUSE_INFO, (0, *SENATE_INFO[1:]), None)
+    db.commit()
+    assert get_sync_state(db, GENERATION_KEY) != generation
+
+
+def test_unchanged_feed_poll_writes_nothing(db):
+    now = datetime(2024, 7, 1, 12)
+    update_source_schedule(
+        db,
+        "gao-reports",
+        interval_seconds=MAX_POLL_INTERVAL,
+        failure_count=0,
+        next_run=now - timedelta(minutes=1),
+    )
+    store_session_info(db, HOUSE_INFO, SENATE_INFO, None)
+    store_fetched_feeds(db, [], {}, {}, now)
+    db.commit()
+    schedules = {schedule.source: schedule for schedule in db.query(SourceSchedule)}
+    written = {state.key: state.updated_at for state in db.query(SyncState)}
+
+    unchanged = FetchedFeed("https://www.gao.gov/rss/reports.xml", "gao-reports", object(), None, [], None)
+    assert store_fetched_feeds(db, [unchanged], schedules, {}, now) == 0
+    assert not db.dirty and not db.new and not db.deleted
+    db.commit()
+    assert {state.key: state.updated_at for state in db.query(SyncState)} == written
+    assert not is_due("gao-reports", schedules["gao-reports"], now)
+    assert is_due("gao-reports", schedules["gao-reports"], now + timedelta(seconds=2 * MAX_POLL_INTERVAL))
@@ -0,0 +1,53 @@
+from datetime import datetime
+import os
+import xml.etree.ElementTree as ElementTree
+
+from app.crud import add_feed_item
+from app.models import FeedItem
+from app.snapshots import SNAPSHOT_DIR, write_snapshots
+
+ITEMS = [
+    {
+        "title": "Statement on H.R. 815 & S. 2226",
+        "link": "https://www.whitehouse.gov/briefing-room/statements-releases/hr-815",
+        "pubDate": datetime(2024, 4, 24, 15),
+        "source": "white-house-legislation",
+    },
+    {
+        "title": "Authority of the Inspector General",
+        "link": "https://www.justice.gov/olc/opinion/authority-inspector-general",
+        "pubDate": datetime(2024, 4, 23, 10),
+        "source": "doj-olc-opinions",
+    },
+]
+
+
+def test_rss_renders_stored_fragments(db, client):
+    add_feed_item(db, ITEMS)
+    db.commit()
+    assert db.query(FeedItem).filter(FeedItem.json_fragment.is_(None)).count() == 0
+
+    response = client.get("/feed/rss")
+    assert response.status_code == 200
+    items = ElementTree.fromstring(response.content).findall("channel/item")
+    assert [item.findtext("title") for item in items] == [item["title"] for item in ITEMS]
+    assert items[0].findtext("pubDate") == "Wed, 24 Apr 2024 15:00:00 GMT"
+
+
+def test_snapshots_match_live_responses(db, client):
+    add_feed_item(db, ITEMS)
+    db.commit()
+    write_snapshots()
+
+    snapshots = {
+        "feed.json": "/feed",
+        "executive.json": "/feed?sources=white-house-presidential-actions,white-house-legislation,potus-schedule",
+        "white-house-legislation.json": "/feed?sources=white-house-legislation",
+        "feed.xml": "/feed/rss",
+    }
+    for file_name, url in snapshots.items():
+        with open(os.path.join(SNAPSHOT_DIR, file_name), "rb") as snapshot:
+            assert snapshot.read() == client.get(url).content
+    # Sources that aren't ingested get no snapshot
+    assert not os.path.exists(os.path.join(SNAPSHOT_DIR, "doj-olc-opinions.json"))
+    assert client.get("/snapshots/feed.xml").content == client.get("/feed/rss").content
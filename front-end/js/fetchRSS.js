@@ -1,8 +1,10 @@
 (function() {
     const API_URL = "https://congress-rss.fly.dev/feed";
+    const SNAPSHOT_URL = "https://congress-rss.fly.dev/snapshots";
     const INDEX_PAGE_NAME = "mainPage";
 
     let items = [];
+    let nextCursor = null;
     let currentSortOrder = 'desc';
     let lastSearchTerm = '';
 
@@ -74,7 +76,7 @@
     }
 
 
-    async function fetchRSS(url, applySourceFilter = false) {
+    async function fetchRSS(url, applySourceFilter = false, fallbackUrl = null) {
         try {
           const response = await fetch(url);
           if (!response.ok) throw new Error(`HTTP error! Status: ${response.status}`);
@@ -82,8 +84,13 @@
           const jsonData = await response.json();
           if (jsonData.status !== 'success') throw new Error(jsonData.message);
           items = jsonData.data;
+          nextCursor = jsonData.next_cursor || null;
           applySourceFilter ? applyFilters() : displayItems(items);
         } catch (error) {
+          if (fallbackUrl) {
+            fetchRSS(fallbackUrl, applySourceFilter);
+            return;
+          }
           document.getElementById('rss-content').textContent = 'No results.';
         }
       }      
@@ -177,11 +184,23 @@
             return;
         }
 
+        fetchRSS(getFeedURL(selectedSources), true);
+    }
+
+    function getFeedURL(selectedSources) {
         let url = `${API_URL}?search_term=${encodeURIComponent(lastSearchTerm)}`;
         if (getPage() != INDEX_PAGE_NAME) {
             url += `&sources=${encodeURIComponent(selectedSources.join(','))}`;
         }
-        fetchRSS(url, true);
+        return url;
+    }
+
+    function fetchFirstPage() {
+        // With every box checked and no search, the page's snapshot holds the same items as the API
+        const snapshotName = getPage() == INDEX_PAGE_NAME
+            ? 'feed'
+            : window.location.pathname.split('/').pop().replace(/\.html$/, '');
+        fetchRSS(`${SNAPSHOT_URL}/${snapshotName}.json`, true, getFeedURL(getSelectedSources()));
     }
 
 
@@ -202,9 +221,22 @@
         document.getElementById('toggleSortButton').addEventListener('click', toggleSortOrder);
 
         window.addEventListener('scroll', handleInfiniteScroll);
-        fetchFilteredResults();
+        fetchFirstPage();
+        subscribeToNewItems();
     });
 
+    function subscribeToNewItems() {
+        if (!window.EventSource) return;
+        // The browser reconnects on its own and resumes from the last event it received
+        const stream = new EventSource(`${API_URL}/stream`);
+        stream.addEventListener('feed-item', event => {
+            // New items are only prepended to the unsearched view
+            if (lastSearchTerm !== '') return;
+            items.unshift(JSON.parse(event.data));
+            applyFilters();
+        });
+    }
+
     function handleInfiniteScroll() {
         const scrollable = document.documentElement.scrollHeight - window.innerHeight;
         const scrolled = window.scrollY;
@@ -219,8 +251,9 @@
     }
 
     async function loadMoreItems() {
-        const offset = items.length; // Assuming 'items' array holds the currently displayed items
-        let url = `${API_URL}?search_term=${encodeURIComponent(lastSearchTerm)}&offset=${offset}`;
+        // The previous page's cursor marks where the next one starts; no cursor means no more items
+        if (!nextCursor) return;
+        let url = `${API_URL}?search_term=${encodeURIComponent(lastSearchTerm)}&cursor=${encodeURIComponent(nextCursor)}`;
 
         const selectedSources = getSelectedSources();
         if (selectedSources.length > 0 && getPage() != INDEX_PAGE_NAME) {
@@ -233,6 +266,7 @@
             const jsonData = await response.json()
             if (jsonData.status !== 'success') throw new Error(`Failed to fetch items: ${jsonData.message}`);
             newItems = jsonData.data;
+            nextCursor = jsonData.next_cursor || null;
             items = items.concat(newItems); // Append new items to the existing list
             displayItems(currentSortOrder, selectedSources, lastSearchTerm);
             window.addEventListener('scroll', handleInfiniteScroll); // Re-attach scroll event listener